@@ -1,6 +1,8 @@
 from mvdb.exceptions import mvdbBaseException
 from mvdb.exceptions import DuplicateMovieError
+from mvdb.exceptions import MovieNotFoundError
 from mvdb.framework import MvDB
+from mvdb.plugins import MvDBInventory
 from mvdb.tasks import package_marquee
 from mvdb.tools import HEADER
 from mvdb.tools import start_timer
@@ -11,7 +13,9 @@ from mvdb.tools import lap_time
 __all__ = [
 "mvdbBaseException",
 "DuplicateMovieError",
+"MovieNotFoundError",
 "MvDB",
+"MvDBInventory",
 "package_marquee",
 "HEADER",
 "start_timer",
@@ -0,0 +1,405 @@
+from pathlib import Path
+import pickle
+import yaml
+
+from mvdb import storage
+from mvdb.offsets import load_movies
+from mvdb.shards import (
+    dump_movies_shards,
+    export_movies_shards,
+    load_movies_shards,
+    read_manifest,
+)
+from mvdb.snapshot import Snapshot, export_snapshot
+
+
+CATALOG_VERSION = 1
+SNAPSHOT_SUFFIX = ".snap"
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def build_catalog(
+    catalogFile: str,
+    hostFile: str="archives/movies.yml",
+    groupFile: str="archives/groups.yml",
+    defaultsFile: str="archives/defaults.yml"
+):
+    """Compiles the Nornir inventory files into a prebuilt binary catalog.
+
+    The host, group and defaults YAML files are parsed once and stored
+    together as a single pickled dict. Each source file's mtime and size
+    is recorded alongside the data so load_catalog can detect a stale
+    catalog and rebuild it.
+
+    Args:
+      catalogFile(str):
+        The file name of the resulting binary catalog.
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+      groupFile(str):
+        Nornir group file. Defaults to "archives/groups.yml".
+      defaultsFile(str):
+        Nornir defaults file. Defaults to "archives/defaults.yml".
+
+    Returns:
+      The catalog dict written to catalogFile.
+    """
+    catalog = {
+        "version" : CATALOG_VERSION,
+        "sources" : source_stamps(hostFile, groupFile, defaultsFile),
+        "hosts" : _load_yaml(hostFile),
+        "groups" : _load_yaml(groupFile),
+        "defaults" : _load_yaml(defaultsFile),
+    }
+    with open(catalogFile, "wb") as f:
+        pickle.dump(catalog, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return catalog
+
+
+def build_sharded_catalog(
+    shardDir: str,
+    hostFile: str="archives/movies.yml",
+    by: str="prefix",
+    shardSize: int=500,
+    prefixLength: int=1
+):
+    """Splits a Nornir host file into YAML shards (see mvdb.shards).
+
+    The host file's stamp and the shard layout are recorded in the
+    manifest, so load_sharded_catalog can detect stale shards and
+    rebuild them the same way. Only shards whose contents changed are
+    rewritten.
+
+    Args:
+      shardDir(str):
+        Directory holding the shards and manifest.
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+      by(str):
+        Either "prefix" or "size". Defaults to "prefix".
+      shardSize(int):
+        Movies per shard when by="size". Defaults to 500.
+      prefixLength(int):
+        sort_key prefix length when by="prefix". Defaults to 1.
+
+    Returns:
+      Tuple of the shard file names written and the number of shards.
+    """
+    layout = {
+        "by" : by,
+        "shardSize" : shardSize,
+        "prefixLength" : prefixLength,
+    }
+    sources = source_stamps(hostFile)
+    shards = dump_movies_shards(_load_yaml(hostFile), **layout)
+    written = export_movies_shards(
+        shards,
+        shardDir,
+        {"sources" : sources, "layout" : layout}
+    )
+
+    return written, len(shards)
+
+
+def build_snapshot_catalog(
+    snapshotFile: str,
+    hostFile: str="archives/movies.yml",
+    groupFile: str="archives/groups.yml",
+    defaultsFile: str="archives/defaults.yml"
+):
+    """Writes a memory-mapped snapshot of the Nornir inventory files.
+
+    The hosts go into the snapshot's columns (see mvdb.snapshot) and
+    the group and defaults data, with every source file's stamp, into
+    its metadata.
+
+    Args:
+      snapshotFile(str):
+        The file name of the resulting snapshot.
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+      groupFile(str):
+        Nornir group file. Defaults to "archives/groups.yml".
+      defaultsFile(str):
+        Nornir defaults file. Defaults to "archives/defaults.yml".
+
+    Returns:
+      None
+    """
+    export_snapshot(hostFile, snapshotFile, {
+        "sources" : source_stamps(hostFile, groupFile, defaultsFile),
+        "groups" : _load_yaml(groupFile),
+        "defaults" : _load_yaml(defaultsFile),
+    })
+
+
+def load_catalog(
+    catalogFile: str,
+    hostFile: str="archives/movies.yml",
+    groupFile: str="archives/groups.yml",
+    defaultsFile: str="archives/defaults.yml",
+    rebuild: bool=True
+):
+    """Reads the prebuilt binary catalog into memory.
+
+    If the catalog is missing, was written by a different catalog
+    version or any of its source files have changed since it was built,
+    it is rebuilt via the build_catalog func. Setting rebuild to False
+    skips the staleness check and trusts the catalog as-is.
+
+    If catalogFile is a SQLite catalog (see mvdb.storage), hosts are
+    read from the database, which is the source of truth, and only the
+    group and defaults files are parsed. If it is a memory-mapped
+    snapshot (see mvdb.snapshot), hosts are served from the shared
+    mapping and the snapshot is rebuilt only when hostFile changes.
+
+    Args:
+      catalogFile(str):
+        The file name of the binary catalog.
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+      groupFile(str):
+        Nornir group file. Defaults to "archives/groups.yml".
+      defaultsFile(str):
+        Nornir defaults file. Defaults to "archives/defaults.yml".
+      rebuild(bool):
+        Whether a missing or stale catalog is rebuilt from the source
+        files. Defaults to True.
+
+    Returns:
+      A dict with "hosts", "groups" and "defaults" keys holding the
+      same structures yaml.safe_load produces for each inventory file.
+    """
+    if Path(catalogFile).suffix in SQLITE_SUFFIXES:
+        return load_sqlite_catalog(catalogFile, groupFile, defaultsFile)
+    if Path(catalogFile).suffix == SNAPSHOT_SUFFIX:
+        return load_snapshot_catalog(
+            catalogFile,
+            hostFile,
+            groupFile,
+            defaultsFile,
+            rebuild
+        )
+
+    sources = (hostFile, groupFile, defaultsFile)
+    try:
+        with open(catalogFile, "rb") as f:
+            catalog = pickle.load(f)
+    except FileNotFoundError:
+        if not rebuild:
+            raise
+        return build_catalog(catalogFile, *sources)
+
+    if rebuild and (
+        catalog.get("version") != CATALOG_VERSION
+        or catalog.get("sources") != source_stamps(*sources)
+    ):
+        catalog = build_catalog(catalogFile, *sources)
+
+    return catalog
+
+
+def load_partial_catalog(
+    keys: list,
+    hostFile: str="archives/movies.yml",
+    groupFile: str="archives/groups.yml",
+    defaultsFile: str="archives/defaults.yml"
+):
+    """Parses only the requested hosts alongside the YAML groups.
+
+    Args:
+      keys(list):
+        Movie keys to load via the offsets.load_movies func.
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+      groupFile(str):
+        Nornir group file. Defaults to "archives/groups.yml".
+      defaultsFile(str):
+        Nornir defaults file. Defaults to "archives/defaults.yml".
+
+    Returns:
+      A dict with "hosts", "groups" and "defaults" keys, as returned by
+      the load_catalog func.
+    """
+    return {
+        "hosts" : load_movies(keys, hostFile),
+        "groups" : _load_yaml(groupFile),
+        "defaults" : _load_yaml(defaultsFile),
+    }
+
+
+def load_sharded_catalog(
+    shardDir: str,
+    groupFile: str="archives/groups.yml",
+    defaultsFile: str="archives/defaults.yml",
+    workers: int=None,
+    hostFile: str="archives/movies.yml",
+    rebuild: bool=True
+):
+    """Parses sharded host files in parallel alongside the YAML groups.
+
+    If the shards are missing or hostFile has changed since they were
+    written, they are rebuilt from it via the build_sharded_catalog
+    func, in the layout recorded in their manifest. Setting rebuild to
+    False skips the staleness check and trusts the shards as-is.
+
+    Args:
+      shardDir(str):
+        Directory of shards written via the build_sharded_catalog func.
+      groupFile(str):
+        Nornir group file. Defaults to "archives/groups.yml".
+      defaultsFile(str):
+        Nornir defaults file. Defaults to "archives/defaults.yml".
+      workers(int):
+        Number of worker processes. Defaults to None, which uses the
+        number of CPUs.
+      hostFile(str):
+        Nornir host file the shards are built from. Defaults to
+        "archives/movies.yml".
+      rebuild(bool):
+        Whether missing or stale shards are rebuilt from hostFile.
+        Defaults to True.
+
+    Returns:
+      A dict with "hosts", "groups" and "defaults" keys, as returned by
+      the load_catalog func.
+    """
+    if rebuild:
+        metadata = read_manifest(shardDir)["metadata"]
+        if metadata.get("sources") != source_stamps(hostFile):
+            build_sharded_catalog(
+                shardDir,
+                hostFile,
+                **metadata.get("layout", {})
+            )
+
+    return {
+        "hosts" : load_movies_shards(shardDir, workers),
+        "groups" : _load_yaml(groupFile),
+        "defaults" : _load_yaml(defaultsFile),
+    }
+
+
+def load_snapshot_catalog(
+    snapshotFile: str,
+    hostFile: str="archives/movies.yml",
+    groupFile: str="archives/groups.yml",
+    defaultsFile: str="archives/defaults.yml",
+    rebuild: bool=True
+):
+    """Maps a snapshot for hosts, with groups & defaults from its metadata.
+
+    The group and defaults data are stored in the snapshot's metadata
+    alongside the stamps of all three source files, so no YAML is
+    parsed at load unless the snapshot is rebuilt.
+
+    Args:
+      snapshotFile(str):
+        Snapshot file written via the build_snapshot_catalog func.
+      hostFile(str):
+        Nornir host file the snapshot is built from. Defaults to
+        "archives/movies.yml".
+      groupFile(str):
+        Nornir group file. Defaults to "archives/groups.yml".
+      defaultsFile(str):
+        Nornir defaults file. Defaults to "archives/defaults.yml".
+      rebuild(bool):
+        Whether a missing or stale snapshot is rebuilt from the source
+        files. Defaults to True.
+
+    Returns:
+      A dict with "hosts", "groups" and "defaults" keys, as returned by
+      the load_catalog func. "hosts" is a read-only snapshot.Snapshot.
+    """
+    stamps = source_stamps(hostFile, groupFile, defaultsFile)
+    try:
+        hosts = Snapshot(snapshotFile)
+    except (FileNotFoundError, ValueError):
+        # Missing or written by another snapshot version.
+        if not rebuild:
+            raise
+        hosts = None
+    if rebuild and (hosts is None or hosts.metadata.get("sources") != stamps):
+        if hosts is not None:
+            hosts.close()
+        build_snapshot_catalog(
+            snapshotFile,
+            hostFile,
+            groupFile,
+            defaultsFile
+        )
+        hosts = Snapshot(snapshotFile)
+    meta = hosts.metadata
+
+    return {
+        "hosts" : hosts,
+        "groups" : meta.get("groups") or _load_yaml(groupFile),
+        "defaults" : meta.get("defaults") or _load_yaml(defaultsFile),
+    }
+
+
+def load_sqlite_catalog(
+    dbFile: str,
+    groupFile: str="archives/groups.yml",
+    defaultsFile: str="archives/defaults.yml"
+):
+    """Reads hosts from a SQLite catalog alongside the YAML groups.
+
+    Args:
+      dbFile(str):
+        SQLite catalog created via the storage.connect func.
+      groupFile(str):
+        Nornir group file. Defaults to "archives/groups.yml".
+      defaultsFile(str):
+        Nornir defaults file. Defaults to "archives/defaults.yml".
+
+    Returns:
+      A dict with "hosts", "groups" and "defaults" keys, as returned by
+      the load_catalog func.
+    """
+    conn = storage.connect(dbFile)
+    try:
+        hosts = storage.fetch_movies(conn)
+    finally:
+        conn.close()
+
+    return {
+        "hosts" : hosts,
+        "groups" : _load_yaml(groupFile),
+        "defaults" : _load_yaml(defaultsFile),
+    }
+
+
+def source_stamps(*files: str):
+    """Fingerprints inventory files by mtime and size.
+
+    Files that do not exist are stamped with None so that creating them
+    later also invalidates any catalog built without them.
+
+    Args:
+      *files(str):
+        File names to fingerprint.
+
+    Returns:
+      A list of [fileName, mtime_ns, size] entries, one per file.
+    """
+    stamps = []
+    for file in files:
+        try:
+            stat = Path(file).stat()
+        except FileNotFoundError:
+            stamps.append([file, None, None])
+        else:
+            stamps.append([file, stat.st_mtime_ns, stat.st_size])
+
+    return stamps
+
+
+def _load_yaml(file: str):
+    """Parses an optional inventory YAML file, returning {} if absent."""
+    try:
+        with open(file) as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
@@ -0,0 +1,256 @@
+from bisect import bisect_left
+from configparser import ConfigParser
+import hashlib
+import json
+
+from mvdb.offsets import iter_blocks, load_movies
+from mvdb.tools import HEADER
+
+
+def diff_barcodes(
+    ogFile: str,
+    rcFile: str,
+    dataHeader: str="barcodes"
+):
+    """Structurally compares two barcode INI files.
+
+    Args:
+      ogFile(str):
+        The original barcodes INI file.
+      rcFile(str):
+        The release candidate barcodes INI file.
+      dataHeader(str):
+        Section header for barcode data in both INI files.
+
+    Returns:
+      A report dict in the format returned by the diff_catalogs func,
+      with UPC changes listed under the "upc" path.
+    """
+    old = _read_barcodes(ogFile, dataHeader)
+    new = _read_barcodes(rcFile, dataHeader)
+    changed = {}
+    for key in new:
+        if key in old and old[key] != new[key]:
+            changed[key] = [
+                {"path" : "upc", "old" : old[key], "new" : new[key]}
+            ]
+
+    common = len(old.keys() & new.keys())
+
+    return _report(old, new, changed, common - len(changed))
+
+
+def diff_catalogs(ogFile: str, rcFile: str):
+    """Structurally compares two Nornir host files.
+
+    Both files are split into movie blocks in a single raw scan each
+    (see mvdb.offsets.iter_blocks) and each block is hashed without
+    being parsed. Movies whose block
+    hashes match are skipped, so only added, removed and edited titles
+    are ever parsed and compared field by field.
+
+    Args:
+      ogFile(str):
+        The original host file, e.g. "archives/movies.yml".
+      rcFile(str):
+        The release candidate host file, e.g. "archives/movies.yml.rc".
+
+    Returns:
+      A report dict with the following keys:
+        added: keys only in rcFile.
+        removed: keys only in ogFile.
+        reordered: keys present in both files whose relative position
+          in the catalog changed.
+        changed: dict of key to a list of field deltas, each a dict of
+          "path", "old" and "new" as returned by the diff_movies func.
+        unchanged: count of movies present in both files with equal
+          values, including blocks which differ only in formatting.
+    """
+    oldIndex, oldHashes = _hash_blocks(ogFile)
+    newIndex, newHashes = _hash_blocks(rcFile)
+    edited = [
+        key for key in newHashes
+        if key in oldHashes and oldHashes[key] != newHashes[key]
+    ]
+    oldMovies = load_movies(edited, ogFile, oldIndex)
+    newMovies = load_movies(edited, rcFile, newIndex)
+    changed = {}
+    for key in edited:
+        deltas = diff_movies(oldMovies[key], newMovies[key])
+        if deltas:
+            changed[key] = deltas
+    common = len(oldHashes.keys() & newHashes.keys())
+
+    return _report(oldIndex, newIndex, changed, common - len(changed))
+
+
+def diff_files(ogFile: str, rcFile: str):
+    """Diffs a pair of host files or barcode INI files.
+
+    Args:
+      ogFile(str):
+        The original file.
+      rcFile(str):
+        The release candidate file. Files ending in ".ini" or ".ini.rc"
+        are compared as barcode files.
+
+    Returns:
+      Report dict returned via the diff_catalogs or diff_barcodes func.
+    """
+    if ogFile.endswith(".ini") or ogFile.endswith(".ini.rc"):
+        return diff_barcodes(ogFile, rcFile)
+
+    return diff_catalogs(ogFile, rcFile)
+
+
+def diff_movies(old, new, path: str=""):
+    """Lists the per-field differences between two movie dicts.
+
+    Equal subtrees are skipped as a whole; only the leaves that differ
+    are reported. Lists are compared as values.
+
+    Args:
+      old:
+        The original movie dict (or any subtree of it).
+      new:
+        The modified movie dict (or the matching subtree).
+      path(str):
+        Dotted path of the subtree being compared. Defaults to "".
+
+    Returns:
+      List of dicts with "path", "old" and "new" keys. Fields missing on
+      one side are reported with a value of None there.
+    """
+    if old == new:
+        return []
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return [{"path" : path, "old" : old, "new" : new}]
+
+    deltas = []
+    for field in (*old, *(k for k in new if k not in old)):
+        deltas.extend(diff_movies(
+            old.get(field),
+            new.get(field),
+            f"{path}.{field}" if path else field
+        ))
+
+    return deltas
+
+
+def format_report(
+    report: dict,
+    ogFile: str,
+    rcFile: str,
+    header: str=HEADER
+):
+    """Renders a diff report for the terminal.
+
+    Args:
+      report(dict):
+        Report returned via the diff_catalogs or diff_barcodes func.
+      ogFile(str):
+        The original file name.
+      rcFile(str):
+        The release candidate file name.
+      header(str):
+        Section break header.
+
+    Returns:
+      The rendered report as a string.
+    """
+    lines = [
+        f"\n{header}\n",
+        f'Changes from "{ogFile}" to "{rcFile}":',
+        f'  {len(report["added"])} added, {len(report["removed"])} '
+          f'removed, {len(report["changed"])} changed, '
+          f'{len(report["reordered"])} reordered, '
+          f'{report["unchanged"]} unchanged.',
+    ]
+    for key in report["added"]:
+        lines.append(f"+ {key}")
+    for key in report["removed"]:
+        lines.append(f"- {key}")
+    for key, deltas in report["changed"].items():
+        lines.append(f"~ {key}")
+        for delta in deltas:
+            lines.append(
+                f'    {delta["path"]}: {json.dumps(delta["old"])} -> '
+                  f'{json.dumps(delta["new"])}'
+            )
+    for key in report["reordered"]:
+        lines.append(f"^ {key}")
+
+    return "\n".join(lines)
+
+
+def _hash_blocks(hostFile: str):
+    """Hashes the raw bytes of every movie block in a host file.
+
+    Returns:
+      Tuple of a dict of key to [start, end] offsets, which the
+      offsets.load_movies func accepts as its index, and a dict of key
+      to block hash, both in file order.
+    """
+    index = {}
+    hashes = {}
+    for key, start, end, block in iter_blocks(hostFile):
+        index[key] = [start, end]
+        hashes[key] = hashlib.blake2b(
+            block.rstrip(b"\n"),
+            digest_size=16
+        ).digest()
+
+    return index, hashes
+
+
+def _read_barcodes(iniFile: str, dataHeader: str):
+    """Reads a barcodes INI file into an ordered dict of key / UPC."""
+    parser = ConfigParser()
+    parser.read(iniFile)
+    if not parser.has_section(dataHeader):
+        return {}
+
+    return dict(parser.items(dataHeader))
+
+
+def _reordered(oldKeys: list, newKeys: list):
+    """Finds common keys outside the longest order-preserving run.
+
+    The common keys' old positions, taken in new order, are run through
+    a patience-sort longest increasing subsequence. Keys outside of it
+    are the minimal set that moved relative to everything else.
+    """
+    newSet = set(newKeys)
+    oldPosition = {key : i for i, key in enumerate(oldKeys) if key in newSet}
+    common = [key for key in newKeys if key in oldPosition]
+    tails = []
+    tailIndex = []
+    parents = [None] * len(common)
+    for i, key in enumerate(common):
+        position = oldPosition[key]
+        j = bisect_left(tails, position)
+        parents[i] = tailIndex[j - 1] if j else None
+        if j == len(tails):
+            tails.append(position)
+            tailIndex.append(i)
+        else:
+            tails[j] = position
+            tailIndex[j] = i
+    stable = set()
+    i = tailIndex[-1] if tailIndex else None
+    while i is not None:
+        stable.add(common[i])
+        i = parents[i]
+
+    return [key for key in common if key not in stable]
+
+
+def _report(old: dict, new: dict, changed: dict, unchanged: int):
+    """Assembles the report dict shared by the diff funcs."""
+    return {
+        "added" : [key for key in new if key not in old],
+        "removed" : [key for key in old if key not in new],
+        "reordered" : _reordered(list(old), list(new)),
+        "changed" : changed,
+        "unchanged" : unchanged,
+    }
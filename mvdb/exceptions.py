@@ -8,3 +8,10 @@ class DuplicateMovieError(mvdbBaseException):
     """Exception raised when a duplicate movie entry is added to catalog."""
 
     pass
+
+
+class MovieNotFoundError(mvdbBaseException, KeyError):
+    """Exception raised when requested movies are not in the catalog."""
+
+    def __str__(self):
+        return str(self.args[0]) if self.args else ""
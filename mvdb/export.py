@@ -0,0 +1,258 @@
+import csv
+import json
+
+from nornir.core.inventory import Defaults, Groups, Host
+
+
+CSV_COLUMNS = (
+    "title",
+    "releaseYear",
+    "aspectRatio",
+    "runtime",
+    "director",
+    "writer",
+    "cinematographer",
+    "editor",
+    "composer",
+    "publisher",
+    "format",
+    "hdr",
+    "discs",
+    "steelbook",
+    "slipcover",
+    "color",
+    "animation",
+    "mpaa",
+    "mpaa_cert",
+    "distributor",
+    "mpaa_reason_raw",
+    "mpaa_reason",
+    "alt_title",
+    "caseReplacement",
+)
+EXTRA_COLUMNS = ("productionDesigner", "upc")
+# Resolved data already encoded by one of the CSV_COLUMNS.
+CSV_MAPPED = (
+    "title",
+    "year",
+    "runtime",
+    "director",
+    "crew",
+    "release",
+    "mpaa",
+    "genres",
+    "format",
+    "hdr",
+    "color",
+    "animation",
+    "steelbook",
+    "slipcover",
+    "needs_case_replacement",
+)
+
+
+def csv_columns(genres: list, groups: Groups, defaults: Defaults):
+    """Lists the columns written via the write_csv func.
+
+    The movies.csv columns come first, in the same order, followed by
+    the genre flags, the production designer and UPC, any inherited
+    data not already represented (e.g. "resolution"), and finally one
+    "group_<name>" column per inventory group.
+
+    Args:
+      genres(list):
+        Genres imported using the data.import_current_genres func.
+      groups(Groups):
+        Inventory groups, e.g. MvDB.inventory.groups.
+      defaults(Defaults):
+        Inventory defaults, e.g. MvDB.inventory.defaults.
+
+    Returns:
+      Tuple of column names.
+    """
+    inherited = {}
+    for data in (defaults.data, *(g.data for g in groups.values())):
+        for key, value in data.items():
+            if key not in CSV_MAPPED and not isinstance(value, dict):
+                inherited[key] = None
+
+    return (
+        *CSV_COLUMNS,
+        *genres,
+        *EXTRA_COLUMNS,
+        *inherited,
+        *(f"group_{name}" for name in groups),
+    )
+
+
+def csv_row(host: Host, genres: list, columns: tuple):
+    """Flattens a movie into a movies.csv row.
+
+    Reverses data.import_movies_csv: lists are rejoined with the
+    delimiters cell_sort split them on, and genres, groups and boolean
+    data are expanded back into flag columns. Values are resolved
+    through the movie's groups and the inventory defaults.
+
+    Args:
+      host(Host):
+        Nornir host representing a single movie.
+      genres(list):
+        Genres imported using the data.import_current_genres func.
+      columns(tuple):
+        Columns returned via the csv_columns func.
+
+    Returns:
+      Dict keyed by columns.
+    """
+    data = host.extended_data()
+    crew = data.get("crew") or {}
+    release = data.get("release") or {}
+    mpaa = data.get("mpaa") or {}
+    rating = mpaa.get("rating")
+    movieGenres = set(data.get("genres") or [])
+    groupNames = {group.name for group in host.extended_groups()}
+    row = {
+        "title" : data["title"],
+        "releaseYear" : data["year"],
+        "aspectRatio" : release.get("aspect_ratio"),
+        "runtime" : data["runtime"],
+        "director" : _join(data.get("director")),
+        "writer" : _join(crew.get("writer")),
+        "cinematographer" : _join(crew.get("cinematographer")),
+        "editor" : _join(crew.get("editor")),
+        "composer" : _join(crew.get("composer")),
+        "publisher" : release.get("publisher"),
+        "format" : (data.get("format") or "").replace(" ", "_"),
+        "hdr" : data["hdr"].lower() if data.get("hdr") else "",
+        "discs" : release.get("discs"),
+        "steelbook" : _flag(data.get("steelbook")),
+        "slipcover" : _flag(data.get("slipcover")),
+        "color" : "" if data.get("color", True) else "FALSE",
+        "animation" : _flag(data.get("animation")),
+        "mpaa" : rating.lower() if rating else "",
+        "mpaa_cert" : mpaa.get("certificate") if rating else "",
+        "distributor" : _join(mpaa.get("distributor"), "|"),
+        "mpaa_reason_raw" : "",
+        "mpaa_reason" : _join(mpaa.get("reason")),
+        "alt_title" : _join(mpaa.get("alt_title"), "; "),
+        "caseReplacement" : _flag(data.get("needs_case_replacement")),
+        "productionDesigner" : _join(crew.get("prod_designer")),
+        "upc" : release.get("upc"),
+    }
+    for genre in genres:
+        row[genre] = _flag(genre in movieGenres)
+    for column in columns:
+        if column in row:
+            continue
+        if column.startswith("group_"):
+            row[column] = _flag(column[len("group_"):] in groupNames)
+        else:
+            row[column] = _cell(data.get(column))
+
+    return {column : _cell(row[column]) for column in columns}
+
+
+def resolve_host(host: Host):
+    """Resolves a movie's data through its groups and the defaults.
+
+    Args:
+      host(Host):
+        Nornir host representing a single movie.
+
+    Returns:
+      JSON-serializable dict with "name", "groups" (as listed in the
+      host file), "extended_groups" (including inherited parents) and
+      "data" (the host's data merged with its groups' and defaults').
+    """
+    return {
+        "name" : host.name,
+        "groups" : [group.name for group in host.groups],
+        "extended_groups" : [group.name for group in host.extended_groups()],
+        "data" : host.extended_data(),
+    }
+
+
+def write_csv(
+    hosts: dict,
+    stream,
+    genres: list,
+    groups: Groups,
+    defaults: Defaults
+):
+    """Streams the resolved catalog to stream as movies.csv rows.
+
+    The output can be re-imported via data.import_movies_csv. Rows are
+    written one at a time, so memory use does not grow with the size of
+    the catalog.
+
+    Args:
+      hosts(dict):
+        Nornir hosts to export, e.g. MvDB.movies.
+      stream:
+        Writable text stream opened with newline="".
+      genres(list):
+        Genres imported using the data.import_current_genres func.
+      groups(Groups):
+        Inventory groups, e.g. MvDB.inventory.groups.
+      defaults(Defaults):
+        Inventory defaults, e.g. MvDB.inventory.defaults.
+
+    Returns:
+      The number of rows written.
+    """
+    columns = csv_columns(genres, groups, defaults)
+    writer = csv.DictWriter(stream, fieldnames=columns)
+    writer.writeheader()
+    total = 0
+    for host in hosts.values():
+        writer.writerow(csv_row(host, genres, columns))
+        total += 1
+
+    return total
+
+
+def write_jsonl(hosts: dict, stream):
+    """Streams the resolved catalog to stream as JSON Lines.
+
+    Each line holds one movie, as returned via the resolve_host func.
+
+    Args:
+      hosts(dict):
+        Nornir hosts to export, e.g. MvDB.movies.
+      stream:
+        Writable text stream.
+
+    Returns:
+      The number of lines written.
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    total = 0
+    for host in hosts.values():
+        stream.write(encoder.encode(resolve_host(host)))
+        stream.write("\n")
+        total += 1
+
+    return total
+
+
+def _cell(value):
+    """Formats a single CSV cell value."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+
+    return value
+
+
+def _flag(value):
+    """Formats a movies.csv flag, which is "TRUE" or left empty."""
+    return "TRUE" if value else ""
+
+
+def _join(value, delimiter: str=","):
+    """Rejoins a value split via the data.cell_sort func."""
+    if isinstance(value, list):
+        return delimiter.join(value)
+
+    return value
@@ -1,6 +1,17 @@
 from configparser import ConfigParser
+import copy
 from nornir import InitNornir
+from nornir.core import Nornir
 from nornir.core.filter import F as nf
+from nornir.core.inventory import Inventory
+import yaml
+
+from mvdb.exceptions import DuplicateMovieError
+from mvdb.journal import read_journal
+import mvdb.plugins  # Registers the MvDBInventory plugin with Nornir.
+from mvdb.plugins.inventory import LazyHosts, build_host
+from mvdb.stats import CatalogStats
+from mvdb.taskcache import CachingRunner, TaskCache
 
 
 class MvDB:
@@ -10,19 +21,37 @@ class MvDB:
     defaults = subdir + "default.yml"
     hosts =  subdir + "movies.yml"
     ini = subdir + "tech_specs.ini"
+    journal = subdir + "movies.journal"
+    groupFilters = {
+        "uhd" : "4k_uhd",
+        "dv" : "hdr10_dv",
+        "hdr10" : "hdr10",
+        "bd" : "blu-ray",
+        "steelbooks" : "steelbook",
+        "slipcovers" : "slipcase",
+        "animation" : "animation",
+        "monochrome" : "black_white",
+    }
 
     def __init__(
         self,
         cfgFile: str=cfg,
         defaultFile: str=defaults,
         hostFile: str=hosts,
-        iniFile: str=ini
+        iniFile: str=ini,
+        keys: list=None,
+        journalFile: str=journal,
+        nr: Nornir=None,
+        parser: ConfigParser=None,
+        taskCache: TaskCache=None
     ):
         """Initializes MvDB Nr instance using specified inventory files.
         
         Args:
           cfgFile(str):
-            Nornir config file. Defaults to "archives/config.yml".
+            Nornir config file. Defaults to "archives/config.yml". Set
+            the inventory plugin to "MvDBInventory" in this file to load
+            from a prebuilt catalog instead of SimpleInventory.
           defaultFile(str):
             Nornir defaults file. Defaults to "archives/defaults.yml".
           hostFile(str):
@@ -30,13 +59,44 @@ class MvDB:
           iniFile(str):
             ConfigParser INI file. Defaults to
             "archives/tech_specs.ini".
+          keys(list):
+            Optional list of movie keys. If set, only these titles are
+            parsed from the host file (via the MvDBInventory plugin and
+            the host file's offset index) instead of the full catalog.
+            Defaults to None.
+          journalFile(str):
+            Mutation journal replayed on top of the loaded inventory
+            (see mvdb.journal). Defaults to "archives/movies.journal".
+          nr(Nornir):
+            Optional prebuilt Nornir object, used instead of loading
+            cfgFile (see mvdb.registry). Defaults to None.
+          parser(ConfigParser):
+            Optional ConfigParser which has already read iniFile, e.g.
+            shared between catalogs. Defaults to None.
+          taskCache(TaskCache):
+            Optional task result cache (see mvdb.taskcache). If set,
+            MvDB.nr.run (and the group filters' run) serve unchanged
+            hosts from the cache. Defaults to None.
         """
-        self.nr = InitNornir(cfgFile)
+        if nr is not None:
+            self.nr = nr
+        elif keys is None:
+            self.nr = InitNornir(cfgFile)
+        else:
+            self.nr = InitNornir(
+                cfgFile,
+                inventory=self.partial_inventory(cfgFile, keys)
+            )
+        if taskCache is not None:
+            self.nr = self.nr.with_runner(
+                CachingRunner(self.nr.runner, taskCache)
+            )
         self.inventory = self.nr.inventory
         self.movies = self.inventory.hosts
-        self.parser = ConfigParser()
-
-        self.parser.read(iniFile)
+        self.parser = parser
+        if parser is None:
+            self.parser = ConfigParser()
+            self.parser.read(iniFile)
 
         self.genres = self.fetch_ini_data("summary", "genres", ",")
         self.subgenres = self.fetch_ini_data("summary", "subgenres", ",")
@@ -49,15 +109,139 @@ class MvDB:
         self.boutiqueLabels = self.fetch_ini_data("boutiqueLabels", "labels",
           ",")
 
-        self.uhd = self.filter_group("4k_uhd")
-        self.dv = self.filter_group("hdr10_dv")
-        self.hdr10 = self.filter_group("hdr10")
-        self.bd = self.filter_group("blu-ray")
+        for attr, group in self.groupFilters.items():
+            setattr(self, attr, self.filter_group(group))
+
+        self._stats = None
+        if journalFile is not None:
+            self.replay_journal(journalFile, keys)
+
+    @property
+    def stats(self):
+        """Collection rollups (see mvdb.stats), built on first access.
+
+        Built lazily so that loading the catalog via the MvDBInventory
+        plugin does not construct every Host up front.
+        """
+        if self._stats is None:
+            self._stats = CatalogStats.from_hosts(self.movies)
+
+        return self._stats
+
+    def add_movie(self, name: str, movie: dict, overwrite: bool=False):
+        """Adds a movie to the loaded inventory and updates the rollups.
+
+        The movie is added to MvDB.movies, to each group filter (e.g.
+        MvDB.uhd) it belongs to and to MvDB.stats in place. Nothing is
+        written to disk.
+
+        Args:
+          name(str):
+            The movie key.
+          movie(dict):
+            The movie's entry, in the same structure as
+            archives/movies.yml (e.g. from mvdb.import_movies_csv).
+          overwrite(bool):
+            Whether an existing movie with the same key is replaced.
+            Defaults to False.
+
+        Returns:
+          The new Nornir Host.
+        """
+        old = self.movies.get(name)
+        if old is not None and not overwrite:
+            raise DuplicateMovieError(
+                f'"{old["title"]}" already in movie catalog!'
+            )
+        host = build_host(
+            name,
+            movie,
+            self.inventory.groups,
+            self.inventory.defaults
+        )
+        self.movies[name] = host
+        if self._stats is not None and old is None:
+            self._stats.add(host)
+        elif self._stats is not None:
+            self._stats.replace(old, host)
+        for attr, group in self.groupFilters.items():
+            filtered = getattr(self, attr).inventory.hosts
+            if host.has_parent_group(group):
+                filtered[name] = host
+            else:
+                filtered.pop(name, None)
+
+        return host
+
+    def remove_movie(self, name: str):
+        """Removes a movie from the loaded inventory and the rollups.
+
+        Args:
+          name(str):
+            The movie key.
+
+        Returns:
+          The removed Nornir Host.
+        """
+        host = self.movies.pop(name)
+        if self._stats is not None:
+            self._stats.remove(host)
+        for attr in self.groupFilters:
+            getattr(self, attr).inventory.hosts.pop(name, None)
+
+        return host
+
+    def replay_journal(self, journalFile: str=journal, keys: list=None):
+        """Applies the mutation journal's edits to the loaded inventory.
+
+        Edits are applied via the add_movie and remove_movie methods, so
+        the group filters and rollups stay current. Nothing is written
+        to disk; see mvdb.journal.compact to fold the journal into the
+        host file.
+
+        Args:
+          journalFile(str):
+            The journal file. Defaults to "archives/movies.journal".
+          keys(list):
+            Optional list of movie keys. If set, only edits to these
+            titles are applied. Defaults to None.
+
+        Returns:
+          The number of records applied.
+        """
+        records = read_journal(journalFile)
+        if keys is not None:
+            keys = set(keys)
+            records = [r for r in records if r["key"] in keys]
+        for record in records:
+            if record["op"] != "delete":
+                self.add_movie(record["key"], record["movie"], overwrite=True)
+            elif record["key"] in self.movies:
+                self.remove_movie(record["key"])
 
-        self.steelbooks = self.filter_group("steelbook")
-        self.slipcovers = self.filter_group("slipcase")
-        self.animation = self.filter_group("animation")
-        self.monochrome = self.filter_group("black_white")
+        return len(records)
+
+    def partial_inventory(self, cfgFile: str, keys: list):
+        """Builds inventory config which loads only the specified movies.
+
+        The inventory options in cfgFile are kept and the plugin is
+        swapped for MvDBInventory with its keys option set.
+
+        Args:
+          cfgFile(str):
+            Nornir config file.
+          keys(list):
+            Movie keys to load.
+
+        Returns:
+          Dict of inventory settings to pass to InitNornir.
+        """
+        with open(cfgFile) as f:
+            cfg = yaml.safe_load(f) or {}
+        options = dict(cfg.get("inventory", {}).get("options") or {})
+        options["keys"] = list(keys)
+
+        return {"plugin" : "MvDBInventory", "options" : options}
 
     def filter_group(self, group: str):
         """Creates filtered Nornir object via parent group.
@@ -71,9 +255,19 @@ class MvDB:
           Nornir object (e.g. MvDB.nr.filter()). This is done prior to
           the inventory phase to enable tasks to work against the filter
           (i.e. using MvDB.nr.run(task=task) to act against the entire
-          or filtered inventory).
+          or filtered inventory). Hosts loaded via the MvDBInventory
+          plugin are filtered without being built.
         """
-        groupFilter = self.nr.filter(nf(has_parent_group=group))
+        hosts = self.inventory.hosts
+        if not isinstance(hosts, LazyHosts):
+            return self.nr.filter(nf(has_parent_group=group))
+
+        groupFilter = copy.copy(self.nr)
+        groupFilter.inventory = Inventory(
+            hosts=hosts.parent_group_hosts(group),
+            groups=self.inventory.groups,
+            defaults=self.inventory.defaults
+        )
 
         return groupFilter
 
@@ -0,0 +1,299 @@
+import contextlib
+import json
+import os
+import yaml
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from mvdb.data import (
+    dump_movies_yaml,
+    fetch_sortKeys,
+    sort_catalog,
+    write_barcodes,
+)
+from mvdb import storage
+
+
+JOURNAL = "archives/movies.journal"
+OPS = ("add", "update", "delete")
+
+
+class Journal:
+    """Append-only log of catalog edits with group commit.
+
+    Used as a context manager, the journal holds an exclusive lock for
+    the duration of the block, so concurrent writers are serialized.
+    Records are buffered and written with a single write & fsync when
+    groupSize records are pending and when the block exits. If the
+    block raises, records not yet committed are discarded.
+
+    Each record is one line holding a CRC32 of its JSON payload, so a
+    torn write left by a crash is detected and dropped on the next
+    open.
+    """
+
+    def __init__(self, path: str=JOURNAL, groupSize: int=64):
+        """Creates a journal writer for path.
+
+        Args:
+          path(str):
+            The journal file. Defaults to JOURNAL.
+          groupSize(int):
+            Number of records buffered per fsync. Defaults to 64.
+        """
+        self.path = path
+        self.groupSize = groupSize
+        self.pending = []
+        self._lock = None
+
+    def __enter__(self):
+        self._lock = lock(self.path)
+        self._lock.__enter__()
+        _, validBytes = _scan(self.path)
+        if os.path.exists(self.path):
+            if os.path.getsize(self.path) > validBytes:
+                os.truncate(self.path, validBytes)
+
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        try:
+            if excType is None:
+                self.commit()
+            else:
+                self.pending = []
+        finally:
+            self._lock.__exit__(excType, exc, tb)
+            self._lock = None
+
+    def add(self, key: str, movie: dict):
+        """Records a new movie, in the same structure as movies.yml."""
+        self._append({"op" : "add", "key" : key, "movie" : movie})
+
+    def update(self, key: str, movie: dict):
+        """Records the new state of an existing movie."""
+        self._append({"op" : "update", "key" : key, "movie" : movie})
+
+    def delete(self, key: str):
+        """Records the removal of a movie."""
+        self._append({"op" : "delete", "key" : key})
+
+    def commit(self):
+        """Writes & fsyncs every pending record in a single batch.
+
+        Returns:
+          The number of records committed.
+        """
+        if not self.pending:
+            return 0
+        if self._lock is None:
+            raise RuntimeError("Journal must be opened via a with block.")
+
+        count = len(self.pending)
+        with open(self.path, "ab") as f:
+            f.write(b"".join(self.pending))
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending = []
+
+        return count
+
+    def _append(self, record: dict):
+        payload = json.dumps(record, separators=(",", ":")).encode()
+        self.pending.append(b"%08x %s\n" % (zlib.crc32(payload), payload))
+        if len(self.pending) >= self.groupSize:
+            self.commit()
+
+
+@contextlib.contextmanager
+def lock(path: str=JOURNAL):
+    """Holds an exclusive lock on path's companion ".lock" file.
+
+    Blocks until any other holder releases it.
+
+    Args:
+      path(str):
+        The file being protected, e.g. the journal. Defaults to
+        JOURNAL.
+    """
+    with open(f"{path}.lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_journal(path: str=JOURNAL):
+    """Reads the committed records from a journal.
+
+    Reading stops at the first torn or corrupt record.
+
+    Args:
+      path(str):
+        The journal file. Defaults to JOURNAL.
+
+    Returns:
+      List of record dicts with "op", "key" and (for adds and updates)
+      "movie" keys, oldest first.
+    """
+    return _scan(path)[0]
+
+
+def replay(movieDict: dict, records: list):
+    """Applies journal records to a dict of movies in place.
+
+    Adds and updates carry the movie's full entry and deletes of
+    missing keys are ignored, so replaying a record more than once has
+    no further effect. New movies are appended to the end of the dict.
+
+    Args:
+      movieDict(dict):
+        Movies in the same structure as archives/movies.yml.
+      records(list):
+        Records returned via the read_journal func.
+
+    Returns:
+      movieDict
+    """
+    for record in records:
+        if record["op"] == "delete":
+            movieDict.pop(record["key"], None)
+        else:
+            movieDict[record["key"]] = record["movie"]
+
+    return movieDict
+
+
+def compact(
+    path: str=JOURNAL,
+    hostFile: str="archives/movies.yml",
+    barcodes: str="archives/barcodes.ini",
+    dbFile: str="archives/movies.db"
+):
+    """Folds the journal into the base catalog and truncates it.
+
+    The base host file is parsed, the journal replayed on top of it and
+    the result re-sorted before the host file and barcodes INI file are
+    atomically replaced. If the SQLite catalog dbFile exists, the
+    records are applied to it first and both files are exported from
+    it, so the database keeps matching movies.yml. The journal lock is
+    held throughout. If a crash occurs before the journal is truncated,
+    its records are simply replayed again.
+
+    Unlike the utils, compaction replaces the catalog files in place
+    rather than writing release candidates: journaled edits are already
+    live (MvDB replays them at load and duplicate checks read them), so
+    folding them in changes how the catalog is stored, not what it
+    holds.
+
+    Args:
+      path(str):
+        The journal file. Defaults to JOURNAL.
+      hostFile(str):
+        The Nornir host file. Defaults to "archives/movies.yml".
+      barcodes(str):
+        The barcodes INI file. Defaults to "archives/barcodes.ini".
+      dbFile(str):
+        The SQLite catalog. Defaults to "archives/movies.db".
+
+    Returns:
+      The number of records folded into the catalog.
+    """
+    with lock(path):
+        records = read_journal(path)
+        if not records:
+            return 0
+
+        if os.path.exists(dbFile):
+            _compact_db(records, dbFile, hostFile, barcodes)
+        else:
+            with open(hostFile) as f:
+                movies = replay(yaml.safe_load(f) or {}, records)
+            sortKeys = fetch_sortKeys(movies)
+            list.sort(sortKeys)
+            movies = sort_catalog(movies, sortKeys, "sort_key")
+
+            write_barcodes(movies, f"{barcodes}.tmp")
+            with open(f"{hostFile}.tmp", "w") as f:
+                f.write(dump_movies_yaml(movies))
+        for fileName in (barcodes, hostFile):
+            _fsync(f"{fileName}.tmp")
+            os.replace(f"{fileName}.tmp", fileName)
+        with open(path, "wb") as f:
+            os.fsync(f.fileno())
+
+    return len(records)
+
+
+def _compact_db(records: list, dbFile: str, hostFile: str, barcodes: str):
+    """Applies journal records to the SQLite catalog and exports it.
+
+    The host file and barcodes INI file are written to ".tmp" files
+    for the compact func to move into place.
+    """
+    final = {}
+    for record in records:
+        final[record["key"]] = record.get("movie")
+    deleted = [key for key, movie in final.items() if movie is None]
+    upserts = {
+        key : movie for key, movie in final.items() if movie is not None
+    }
+    conn = storage.connect(dbFile)
+    try:
+        storage.delete_movies(conn, deleted)
+        storage.add_movies(conn, upserts, overwrite=True)
+        storage.export_barcodes_ini(conn, f"{barcodes}.tmp")
+        storage.export_movies(conn, f"{hostFile}.tmp")
+    finally:
+        conn.close()
+
+
+def _fsync(fileName: str):
+    with open(fileName, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _scan(path: str):
+    """Parses the valid prefix of a journal.
+
+    Returns:
+      Tuple of the records and the byte length of the valid prefix.
+    """
+    records = []
+    validBytes = 0
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return records, validBytes
+
+    with f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            checksum, _, payload = line.rstrip(b"\n").partition(b" ")
+            try:
+                if int(checksum, 16) != zlib.crc32(payload):
+                    break
+                record = json.loads(payload)
+            except ValueError:
+                break
+            if record.get("op") not in OPS:
+                break
+            records.append(record)
+            validBytes += len(line)
+
+    return records, validBytes
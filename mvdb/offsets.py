@@ -0,0 +1,247 @@
+import json
+import os
+from pathlib import Path
+import re
+import yaml
+
+from mvdb.data import dump_movies_yaml
+from mvdb.exceptions import MovieNotFoundError
+
+
+INDEX_VERSION = 2
+_PLAIN_INT = re.compile(r"0|[1-9][0-9]*")
+_PLAIN_STR = re.compile(r"[A-Za-z][A-Za-z0-9_.-]*")
+_RESERVED = {"yes", "no", "true", "false", "on", "off", "null"}
+_KEY_LINE = re.compile(rb"^(?![ \t\r\n#]|---)[^\n]+", re.M)
+_SORT_KEY_LINE = re.compile(rb"^(  sort_key:[^\n]*)", re.M)
+_UPC_LINE = re.compile(
+    rb"^    release:[^\n]*\n(?:      [^\n]*\n)*?(      upc:[^\n]*)",
+    re.M
+)
+
+
+def build_offset_index(hostFile: str="archives/movies.yml"):
+    """Maps each movie key in a host file to its byte range.
+
+    The file is split into movie blocks via the iter_blocks func
+    without being parsed. Only each block's sort_key and release.upc
+    lines are decoded, as plain scalars where possible.
+
+    Args:
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+
+    Returns:
+      A dict keyed by movie key whose values are [start, end, sortKey,
+      upc] lists, in file order.
+    """
+    index = {}
+    for key, start, end, block in iter_blocks(hostFile):
+        sortKey = _SORT_KEY_LINE.search(block)
+        upc = _UPC_LINE.search(block)
+        index[key] = [
+            start,
+            end,
+            _parse_scalar(sortKey[1], "sort_key") if sortKey else None,
+            _parse_scalar(upc[1], "upc") if upc else None,
+        ]
+
+    return index
+
+
+def iter_blocks(hostFile: str="archives/movies.yml"):
+    """Splits a host file into its raw movie blocks.
+
+    Every top-level block written by the data.dump_movies_yaml func
+    starts at column 0 with the movie key, so the blocks are found with
+    a single scan of the raw bytes and only the key lines are decoded.
+
+    Args:
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+
+    Yields:
+      Tuples of the movie key, the block's start and end byte offsets
+      and the block's raw bytes, in file order.
+    """
+    with open(hostFile, "rb") as f:
+        blob = f.read()
+    starts = [(m.start(), m[0]) for m in _KEY_LINE.finditer(blob)]
+    ends = [start for start, _ in starts[1:]] + [len(blob)]
+    for (start, line), end in zip(starts, ends):
+        yield _parse_key(line), start, end, blob[start:end]
+
+
+def load_movies(
+    keys: list,
+    hostFile: str="archives/movies.yml",
+    index: dict=None
+):
+    """Parses only the requested movie blocks from a host file.
+
+    The byte range of each requested key is read from the offset index
+    and the blocks are parsed together, so the cost is proportional to
+    the number of keys rather than the size of the catalog.
+
+    Args:
+      keys(list):
+        Movie keys to load.
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+      index(dict):
+        Offset index returned via the load_offset_index func. Defaults
+        to None, which loads it.
+
+    Returns:
+      Dict of the requested movies in catalog order, as yaml.safe_load
+      would produce for the full file.
+
+    Raises:
+      MovieNotFoundError (a KeyError) naming every key which is not in
+      the catalog.
+    """
+    if index is None:
+        index = load_offset_index(hostFile)
+    missing = [key for key in keys if key not in index]
+    if missing:
+        raise MovieNotFoundError(
+            f'Not in "{hostFile}": {", ".join(missing)}'
+        )
+    spans = sorted({tuple(index[key][:2]) for key in keys})
+    chunks = []
+    with open(hostFile, "rb") as f:
+        for start, end in spans:
+            f.seek(start)
+            chunks.append(f.read(end - start))
+
+    return yaml.safe_load(b"".join(chunks).decode()) or {}
+
+
+def load_offset_index(
+    hostFile: str="archives/movies.yml",
+    indexFile: str=None
+):
+    """Reads the sidecar offset index, rebuilding it if stale.
+
+    The index is stored as JSON next to the host file alongside the
+    host file's mtime and size. If either differs from the host file on
+    disk, the index is rebuilt via the build_offset_index func and
+    rewritten.
+
+    Args:
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+      indexFile(str):
+        Sidecar index file. Defaults to hostFile + ".idx".
+
+    Returns:
+      The offset index, as returned by the build_offset_index func.
+    """
+    if indexFile is None:
+        indexFile = hostFile + ".idx"
+    stat = Path(hostFile).stat()
+    stamp = [INDEX_VERSION, stat.st_mtime_ns, stat.st_size]
+    try:
+        with open(indexFile) as f:
+            sidecar = json.load(f)
+    except (FileNotFoundError, ValueError):
+        sidecar = {}
+    if sidecar.get("stamp") == stamp:
+        return sidecar["movies"]
+
+    index = build_offset_index(hostFile)
+    tmpFile = f"{indexFile}.{os.getpid()}.tmp"
+    with open(tmpFile, "w") as f:
+        json.dump({"stamp" : stamp, "movies" : index}, f)
+    os.replace(tmpFile, indexFile)
+
+    return index
+
+
+def merged_order(index: dict, movieDict: dict):
+    """Sorts the union of indexed and in-memory movies by sort_key.
+
+    Args:
+      index(dict):
+        Offset index returned via the load_offset_index func.
+      movieDict(dict):
+        New or modified movies, which take precedence over the index.
+
+    Returns:
+      List of movie keys in catalog order.
+    """
+    sortKeys = {key : entry[2] for key, entry in index.items()}
+    for key, mv in movieDict.items():
+        sortKeys[key] = mv["sort_key"]
+
+    return sorted(sortKeys, key=sortKeys.get)
+
+
+def splice_movies(
+    movieDict: dict,
+    hostFile: str="archives/movies.yml",
+    index: dict=None
+):
+    """Builds a new host file with movieDict spliced into the catalog.
+
+    Blocks for movies not in movieDict are copied from hostFile byte
+    for byte; only the movies in movieDict are dumped. The result is
+    identical to running the data.dump_movies_yaml func over the full,
+    sorted catalog.
+
+    Args:
+      movieDict(dict):
+        New or modified movies. Entries replace any block with the same
+        key.
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+      index(dict):
+        Offset index returned via the load_offset_index func. Defaults
+        to None, which loads it.
+
+    Returns:
+      A string value of the resulting host file.
+    """
+    if index is None:
+        index = load_offset_index(hostFile)
+    export = "---"
+    with open(hostFile, "rb") as f:
+        for key in merged_order(index, movieDict):
+            if key in movieDict:
+                blob = dump_movies_yaml({key : movieDict[key]})[4:]
+            else:
+                start, end = index[key][:2]
+                f.seek(start)
+                blob = f.read(end - start).decode()
+                if blob.endswith("\n\n"):
+                    blob = blob[:-1]
+            export += f"\n{blob}"
+
+    return export
+
+
+def _parse_key(line: bytes):
+    """Extracts the movie key from a top-level block's first line."""
+    text = line.decode().rstrip("\r\n")
+    if text.endswith(":") and text[0] not in "'\"":
+        return text[:-1]
+
+    return next(iter(yaml.safe_load(text)))
+
+
+def _parse_scalar(line: bytes, field: str):
+    """Reads the value of a "field: value" line.
+
+    Values which can only be plain strings or plain ints, as the
+    data.dump_movies_yaml func writes sort_key and upc, are read
+    directly; anything else (quoted, null, bool-like, etc.) is parsed
+    via yaml.safe_load.
+    """
+    text = line.decode().strip()
+    value = text[len(field) + 1:].strip()
+    if _PLAIN_INT.fullmatch(value):
+        return int(value)
+    if _PLAIN_STR.fullmatch(value) and value.lower() not in _RESERVED:
+        return value
+
+    return yaml.safe_load(text)[field]
@@ -0,0 +1,11 @@
+from nornir.core.plugins.inventory import InventoryPluginRegister
+
+from mvdb.plugins.inventory import MvDBInventory
+
+
+InventoryPluginRegister.register("MvDBInventory", MvDBInventory)
+
+
+__all__ = [
+    "MvDBInventory",
+]
@@ -0,0 +1,321 @@
+from typing import Any
+
+from nornir.core.inventory import (
+    Defaults,
+    Group,
+    Groups,
+    Host,
+    Hosts,
+    Inventory,
+    ParentGroups,
+)
+
+from mvdb.catalog import (
+    load_catalog,
+    load_partial_catalog,
+    load_sharded_catalog,
+)
+from mvdb.snapshot import Snapshot
+
+
+_UNBUILT = object()
+
+
+class LazyHosts(Hosts):
+    """Nornir Hosts dict which builds each Host on first access.
+
+    Every movie key is present from the start so len(), iteration and
+    membership tests behave exactly like a populated Hosts dict, but the
+    Host object itself is only constructed from the raw catalog data the
+    first time it is read.
+
+    Reading values() or items() builds every host, so Nornir's own
+    filters (which visit each host) are not lazy; the parent_group_hosts
+    method filters on the raw data instead.
+    """
+
+    def __init__(
+        self,
+        rawHosts: dict,
+        groups: Groups,
+        defaults: Defaults,
+        source: "LazyHosts"=None
+    ):
+        super().__init__(dict.fromkeys(rawHosts, _UNBUILT))
+        self._raw = rawHosts
+        self._groups = groups
+        self._defaults = defaults
+        self._source = source
+        self._snapshotGroups = None
+
+    def _build(self, name: str):
+        if self._source is not None:
+            host = self._source[name]
+        else:
+            host = build_host(
+                name,
+                self._raw[name],
+                self._groups,
+                self._defaults
+            )
+        dict.__setitem__(self, name, host)
+
+        return host
+
+    def parent_group_hosts(self, group: str):
+        """Filters hosts by parent group without building them.
+
+        Unbuilt hosts are matched on their raw "groups" list, resolved
+        through the inventory groups the same way Host.has_parent_group
+        resolves them. The result builds its hosts through this object,
+        so both share the same Host objects.
+
+        Args:
+          group(str):
+            Name of the parent group.
+
+        Returns:
+          LazyHosts object holding the matching movies.
+        """
+        matches = {}
+        members = {}
+        for name, host in dict.items(self):
+            if host is not _UNBUILT:
+                if host.has_parent_group(group):
+                    members[name] = host
+                continue
+            for g in self._raw_groups(name):
+                if g not in matches:
+                    matches[g] = (
+                        g == group or self._groups[g].has_parent_group(group)
+                    )
+                if matches[g]:
+                    members[name] = _UNBUILT
+                    break
+        hosts = LazyHosts(members, self._groups, self._defaults, self)
+        for name, host in members.items():
+            if host is not _UNBUILT:
+                dict.__setitem__(hosts, name, host)
+
+        return hosts
+
+    def _raw_groups(self, name: str):
+        """An unbuilt host's groups, read without decoding a snapshot."""
+        if isinstance(self._raw, Snapshot):
+            if self._snapshotGroups is None:
+                self._snapshotGroups = self._raw.groups()
+            return self._snapshotGroups[name]
+
+        return self._raw[name].get("groups") or []
+
+    def __getitem__(self, name: str):
+        host = dict.__getitem__(self, name)
+        if host is _UNBUILT:
+            host = self._build(name)
+
+        return host
+
+    def get(self, name: str, default: Any=None):
+        if name in self:
+            return self[name]
+
+        return default
+
+    def pop(self, name: str, *default: Any):
+        """Removes a host without building it via the source.
+
+        An unbuilt host of a filtered LazyHosts (see the
+        parent_group_hosts method) may already be gone from its
+        source, so it is dropped and popped as None.
+        """
+        if name not in self:
+            return dict.pop(self, name, *default)
+        host = dict.pop(self, name)
+        if host is not _UNBUILT:
+            return host
+        if self._source is not None:
+            return None
+
+        return build_host(name, self._raw[name], self._groups, self._defaults)
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+
+class MvDBInventory:
+    """Nornir inventory plugin backed by a prebuilt mvdb catalog.
+
+    Opt in via config.yml by setting the inventory plugin to
+    "MvDBInventory". The options mirror SimpleInventory's, plus the
+    location of the prebuilt catalog.
+    """
+
+    def __init__(
+        self,
+        catalog_file: str="archives/movies.catalog",
+        host_file: str="archives/movies.yml",
+        group_file: str="archives/groups.yml",
+        defaults_file: str="archives/defaults.yml",
+        rebuild: bool=True,
+        keys: list=None,
+        shard_dir: str=None,
+        shard_workers: int=None
+    ):
+        """Stores the catalog and source file locations.
+
+        Args:
+          catalog_file(str):
+            Prebuilt binary catalog, a SQLite catalog if the file ends
+            in ".db" or a memory-mapped snapshot if it ends in ".snap".
+            Defaults to "archives/movies.catalog".
+          host_file(str):
+            Nornir host file the catalog is built from. Defaults to
+            "archives/movies.yml".
+          group_file(str):
+            Nornir group file. Defaults to "archives/groups.yml".
+          defaults_file(str):
+            Nornir defaults file. Defaults to "archives/defaults.yml".
+          rebuild(bool):
+            Whether a missing or stale catalog is rebuilt from the
+            source files at load. Defaults to True.
+          keys(list):
+            Optional list of movie keys. If set, only these movies are
+            parsed from host_file via its offset index and the catalog
+            is not used. Defaults to None.
+          shard_dir(str):
+            Optional directory of sharded host files (see
+            mvdb.shards). If set, the shards are parsed in parallel
+            instead of reading host_file or the catalog. Defaults to
+            None.
+          shard_workers(int):
+            Number of processes used to parse shards. Defaults to None,
+            which uses the number of CPUs.
+        """
+        self.catalog_file = catalog_file
+        self.host_file = host_file
+        self.group_file = group_file
+        self.defaults_file = defaults_file
+        self.rebuild = rebuild
+        self.keys = keys
+        self.shard_dir = shard_dir
+        self.shard_workers = shard_workers
+
+    def load(self):
+        """Builds the Nornir Inventory from the catalog.
+
+        Defaults and Groups are built up front, with parent groups
+        resolved the same way SimpleInventory resolves groups.yml, so
+        inheritance is unchanged. Hosts are built lazily.
+
+        Returns:
+          Nornir Inventory object.
+        """
+        if self.shard_dir is not None:
+            catalog = load_sharded_catalog(
+                self.shard_dir,
+                self.group_file,
+                self.defaults_file,
+                self.shard_workers,
+                hostFile=self.host_file,
+                rebuild=self.rebuild
+            )
+        elif self.keys is not None:
+            catalog = load_partial_catalog(
+                self.keys,
+                self.host_file,
+                self.group_file,
+                self.defaults_file
+            )
+        else:
+            catalog = load_catalog(
+                self.catalog_file,
+                self.host_file,
+                self.group_file,
+                self.defaults_file,
+                rebuild=self.rebuild
+            )
+
+        return build_inventory(
+            catalog["hosts"],
+            catalog["groups"],
+            catalog["defaults"]
+        )
+
+
+def build_host(name: str, raw: dict, groups: Groups, defaults: Defaults):
+    """Builds a Nornir Host from a single movies.yml entry.
+
+    Args:
+      name(str):
+        The movie key.
+      raw(dict):
+        The movie's entry, in the same structure as archives/movies.yml.
+      groups(Groups):
+        Inventory groups used to resolve the movie's parent groups.
+      defaults(Defaults):
+        Inventory defaults.
+
+    Returns:
+      Nornir Host object.
+    """
+    return Host(
+        name=name,
+        data=raw.get("data"),
+        groups=ParentGroups([groups[g] for g in raw.get("groups") or []]),
+        defaults=defaults,
+    )
+
+
+def build_groups(rawGroups: dict, rawDefaults: dict):
+    """Builds Nornir Groups and Defaults from raw inventory dicts.
+
+    Parent groups are resolved the same way SimpleInventory resolves
+    groups.yml. The result holds no host data, so it can be shared by
+    several inventories (see mvdb.registry).
+
+    Args:
+      rawGroups(dict):
+        Group data in the same structure as archives/groups.yml.
+      rawDefaults(dict):
+        Defaults data in the same structure as archives/defaults.yml.
+
+    Returns:
+      Tuple of the Nornir Groups and Defaults objects.
+    """
+    defaults = Defaults(data=rawDefaults.get("data"))
+    groups = Groups()
+    for name, group in rawGroups.items():
+        groups[name] = Group(
+            name=name,
+            data=group.get("data"),
+            defaults=defaults,
+        )
+    for name, group in rawGroups.items():
+        groups[name].groups = ParentGroups(
+            [groups[g] for g in group.get("groups") or []]
+        )
+
+    return groups, defaults
+
+
+def build_inventory(rawHosts: dict, rawGroups: dict, rawDefaults: dict):
+    """Assembles a Nornir Inventory from raw inventory dicts.
+
+    Args:
+      rawHosts(dict):
+        Host data in the same structure as archives/movies.yml.
+      rawGroups(dict):
+        Group data in the same structure as archives/groups.yml.
+      rawDefaults(dict):
+        Defaults data in the same structure as archives/defaults.yml.
+
+    Returns:
+      Nornir Inventory object whose hosts are built on first access.
+    """
+    groups, defaults = build_groups(rawGroups, rawDefaults)
+    hosts = LazyHosts(rawHosts, groups, defaults)
+
+    return Inventory(hosts=hosts, groups=groups, defaults=defaults)
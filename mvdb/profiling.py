@@ -0,0 +1,272 @@
+from collections import Counter, defaultdict
+import contextlib
+import cProfile
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+
+PROFILE_DIR = "profile/"
+MIN_MICROSECONDS = 1
+
+_active = None
+
+
+class Profiler:
+    """Profiles the named stages of a utils pipeline.
+
+    Each stage gets its own cProfile run and tracemalloc window, so time
+    and memory can be attributed to the mvdb.data funcs called within
+    it. Both add overhead, so wall times are only comparable between
+    profiled runs.
+    """
+
+    def __init__(self, outDir: str=PROFILE_DIR, topAllocations: int=10):
+        """Creates a profiler writing its results to outDir.
+
+        Args:
+          outDir(str):
+            Directory the results are written to. Defaults to
+            PROFILE_DIR.
+          topAllocations(int):
+            Number of allocation sites listed per stage. Defaults to 10.
+        """
+        self.outDir = outDir
+        self.topAllocations = topAllocations
+        self.stages = []
+        self.running = False
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Profiles the enclosed block as a single pipeline stage.
+
+        Nested stages are folded into the enclosing one.
+
+        Args:
+          name(str):
+            Stage name, e.g. "csv_read" or "yaml_dump".
+        """
+        if self.running:
+            yield
+            return
+
+        self.running = True
+        profile = cProfile.Profile()
+        before = tracemalloc.take_snapshot()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            self.running = False
+            self.stages.append({
+                "name" : name,
+                "wall" : wall,
+                "peak" : peak - baseline,
+                "net" : current - baseline,
+                "stats" : pstats.Stats(profile),
+                "allocations" : after.compare_to(before, "lineno"),
+            })
+
+    def write(self):
+        """Writes the per-stage results and summary table to outDir.
+
+        For each stage, "NN-<stage>.pstats" holds the raw cProfile
+        stats, "NN-<stage>.collapsed" the collapsed stacks (one
+        "frame;frame;frame microseconds" line each, as read by
+        flamegraph.pl and speedscope) and "NN-<stage>.alloc.txt" the top
+        allocation sites. "all.collapsed" merges every stage under a
+        root frame named after it.
+
+        Returns:
+          The summary table as a string, also written to "summary.txt".
+        """
+        os.makedirs(self.outDir, exist_ok=True)
+        merged = []
+        for i, stage in enumerate(self.stages, 1):
+            prefix = os.path.join(self.outDir, f"{i:02d}-{stage['name']}")
+            stage["stats"].dump_stats(f"{prefix}.pstats")
+            stacks = collapse_stats(stage["stats"])
+            with open(f"{prefix}.collapsed", "w") as f:
+                for stack, micros in stacks.items():
+                    f.write(f"{stack} {micros}\n")
+                    merged.append(f"{stage['name']};{stack} {micros}\n")
+            with open(f"{prefix}.alloc.txt", "w") as f:
+                for alloc in stage["allocations"][:self.topAllocations]:
+                    f.write(f"{alloc}\n")
+        with open(os.path.join(self.outDir, "all.collapsed"), "w") as f:
+            f.writelines(merged)
+
+        table = self.summary()
+        with open(os.path.join(self.outDir, "summary.txt"), "w") as f:
+            f.write(table + "\n")
+
+        return table
+
+    def summary(self):
+        """Formats the stages as a fixed-width summary table.
+
+        Returns:
+          The table as a string, one row per stage plus a total.
+        """
+        rows = [("stage", "wall (s)", "peak (MiB)", "net (MiB)", "calls",
+          "top function (tottime)")]
+        for stage in self.stages:
+            stats = stage["stats"].stats
+            top = max(
+                (f for f in stats if not _internal(f)),
+                key=lambda f: stats[f][2],
+                default=None
+            )
+            rows.append((
+                stage["name"],
+                f"{stage['wall']:.3f}",
+                f"{stage['peak'] / 2**20:.2f}",
+                f"{stage['net'] / 2**20:.2f}",
+                str(stage["stats"].total_calls),
+                _label(top) if top is not None else "",
+            ))
+        rows.append((
+            "total",
+            f"{sum(s['wall'] for s in self.stages):.3f}",
+            f"{max((s['peak'] for s in self.stages), default=0) / 2**20:.2f}",
+            f"{sum(s['net'] for s in self.stages) / 2**20:.2f}",
+            str(sum(s["stats"].total_calls for s in self.stages)),
+            "",
+        ))
+        widths = [max(len(row[i]) for row in rows) for i in range(6)]
+
+        return "\n".join(
+            "  ".join(cell.ljust(w) for cell, w in zip(row, widths)).rstrip()
+            for row in rows
+        )
+
+
+def collapse_stats(stats: pstats.Stats):
+    """Converts cProfile stats into collapsed stacks.
+
+    cProfile only records caller / callee pairs, so full stacks are
+    rebuilt by walking the call graph from its roots. A callee's time is
+    split between its callers in proportion to the cumulative time each
+    call edge accounts for; recursive edges are cut and paths worth
+    less than MIN_MICROSECONDS are pruned.
+
+    Args:
+      stats(pstats.Stats):
+        Stats of a single profiled stage.
+
+    Returns:
+      Dict of ";"-joined stack to its self time in whole microseconds.
+    """
+    raw = stats.stats
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+    roots = [
+        func for func, entry in raw.items()
+        if not entry[4] and not _internal(func)
+        and func[0] != contextlib.__file__
+    ]
+    stacks = Counter()
+
+    def walk(func, scale, path, seen):
+        tottime = raw[func][2]
+        path = (*path, _label(func))
+        micros = tottime * scale * 1e6
+        if micros >= MIN_MICROSECONDS:
+            stacks[";".join(path)] += micros
+        for callee, edgeTime in callees[func].items():
+            total = raw[callee][3]
+            share = scale * edgeTime / total if total else 0.0
+            if callee in seen or _internal(callee):
+                continue
+            if total * share * 1e6 < MIN_MICROSECONDS:
+                continue
+            walk(callee, share, path, seen | {callee})
+
+    for root in roots:
+        walk(root, 1.0, (), {root})
+
+    return {stack : round(micros) for stack, micros in stacks.items()}
+
+
+@contextlib.contextmanager
+def profile(outDir: str=None):
+    """Profiles every stage entered in the enclosed block.
+
+    While active, blocks wrapped in the stage func are profiled and the
+    results and summary table are written to outDir on exit. The
+    summary table is also printed to stderr.
+
+    Args:
+      outDir(str):
+        Directory the results are written to. Defaults to None, which
+        disables profiling.
+
+    Yields:
+      The Profiler object, or None if profiling is disabled.
+    """
+    global _active
+    if outDir is None:
+        yield None
+        return
+
+    profiler = Profiler(outDir)
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = None
+        if not tracing:
+            tracemalloc.stop()
+        table = profiler.write()
+        print(
+            f'\nProfile written to "{outDir}".\n\n{table}',
+            file=sys.stderr
+        )
+
+
+def stage(name: str):
+    """Marks a pipeline stage for the active profiler, if any.
+
+    Args:
+      name(str):
+        Stage name, e.g. "csv_read" or "yaml_dump".
+
+    Returns:
+      A context manager, which does nothing unless called within the
+      profile func's block.
+    """
+    if _active is None:
+        return contextlib.nullcontext()
+
+    return _active.stage(name)
+
+
+def _internal(func: tuple):
+    """Whether a frame belongs to the profiler's own bookkeeping."""
+    file, _, name = func
+
+    return file == __file__ or "_lsprof" in name
+
+
+def _label(func: tuple):
+    """Formats a pstats func tuple as a flame graph frame."""
+    file, line, name = func
+    if file == "~":
+        return name.replace(";", ",")
+    module = os.path.splitext(os.path.basename(file))[0]
+
+    return f"{module}:{name}:{line}".replace(";", ",")
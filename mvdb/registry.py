@@ -0,0 +1,215 @@
+from collections import OrderedDict
+from configparser import ConfigParser
+import sys
+import threading
+import yaml
+
+from nornir.core import Nornir
+from nornir.core.configuration import Config
+from nornir.core.inventory import Inventory
+from nornir.core.state import GlobalState
+from nornir.init_nornir import load_runner
+
+from mvdb.catalog import load_catalog
+from mvdb.framework import MvDB
+from mvdb.plugins.inventory import LazyHosts, build_groups
+
+
+class CatalogRegistry:
+    """Hosts many MvDB catalogs in a single process.
+
+    The tech specs, group & default definitions and Nornir config are
+    loaded once and shared by every catalog. Host data is run through a
+    shared intern pool as it is loaded, so strings repeated across
+    catalogs (publishers, distributors, crew names, genres, group tags,
+    field names) are stored once. The memory held per catalog is then
+    its own dict structure plus the values unique to it.
+
+    At most capacity catalogs are held in memory; loading another
+    evicts the least recently used one, which is reloaded from disk on
+    its next access. Catalogs load outside the registry lock, under a
+    lock of their own, so a cold load never blocks access to the
+    catalogs already in memory.
+    """
+
+    def __init__(
+        self,
+        cfgFile: str=MvDB.cfg,
+        groupFile: str="archives/groups.yml",
+        defaultsFile: str="archives/defaults.yml",
+        iniFile: str=MvDB.ini,
+        capacity: int=8
+    ):
+        """Loads the shared spec data.
+
+        Args:
+          cfgFile(str):
+            Nornir config file, used for the runner and logging
+            settings. Defaults to "archives/config.yml".
+          groupFile(str):
+            Nornir group file shared by every catalog. Defaults to
+            "archives/groups.yml".
+          defaultsFile(str):
+            Nornir defaults file shared by every catalog. Defaults to
+            "archives/defaults.yml".
+          iniFile(str):
+            ConfigParser INI file shared by every catalog. Defaults to
+            "archives/tech_specs.ini".
+          capacity(int):
+            Maximum number of catalogs held in memory. Defaults to 8.
+        """
+        self.config = Config.from_file(cfgFile)
+        self.parser = ConfigParser()
+        self.parser.read(iniFile)
+        with open(groupFile) as f:
+            rawGroups = intern_tree(yaml.safe_load(f) or {})
+        with open(defaultsFile) as f:
+            rawDefaults = intern_tree(yaml.safe_load(f) or {})
+        self.groupFile = groupFile
+        self.defaultsFile = defaultsFile
+        self.groups, self.defaults = build_groups(rawGroups, rawDefaults)
+        self.capacity = capacity
+        self.catalogs = {}
+        self.loaded = OrderedDict()
+        self._lock = threading.RLock()
+        self._loadLocks = {}
+
+    def __contains__(self, name: str):
+        return name in self.catalogs
+
+    def __len__(self):
+        return len(self.catalogs)
+
+    def register(
+        self,
+        name: str,
+        hostFile: str,
+        journalFile: str=None,
+        catalogFile: str=None
+    ):
+        """Registers a catalog without loading it.
+
+        Args:
+          name(str):
+            Name the catalog is retrieved by, e.g. the owner's user
+            name.
+          hostFile(str):
+            The catalog's Nornir host file.
+          journalFile(str):
+            Optional mutation journal replayed at load (see
+            mvdb.journal). Defaults to None.
+          catalogFile(str):
+            Optional prebuilt binary catalog of hostFile (see
+            mvdb.catalog), rebuilt when stale. Defaults to None, which
+            parses hostFile directly.
+
+        Returns:
+          None
+        """
+        with self._lock:
+            self.catalogs[name] = {
+                "hostFile" : hostFile,
+                "journalFile" : journalFile,
+                "catalogFile" : catalogFile,
+            }
+            self.loaded.pop(name, None)
+
+    def get(self, name: str):
+        """Returns a catalog, loading it if it is not in memory.
+
+        Args:
+          name(str):
+            Name the catalog was registered under.
+
+        Returns:
+          MvDB object.
+        """
+        with self._lock:
+            if name in self.loaded:
+                self.loaded.move_to_end(name)
+                return self.loaded[name]
+            entry = self.catalogs[name]
+            loadLock = self._loadLocks.setdefault(name, threading.Lock())
+
+        with loadLock:
+            with self._lock:
+                if name in self.loaded:
+                    self.loaded.move_to_end(name)
+                    return self.loaded[name]
+                entry = self.catalogs[name]
+
+            db = self._load(entry)
+
+            with self._lock:
+                # Skip caching if the catalog was re-registered mid-load
+                if self.catalogs.get(name) is entry:
+                    self.loaded[name] = db
+                    while len(self.loaded) > self.capacity:
+                        self.loaded.popitem(last=False)
+
+            return db
+
+    __getitem__ = get
+
+    def evict(self, name: str):
+        """Drops a catalog from memory; it stays registered.
+
+        Returns:
+          True if the catalog was loaded.
+        """
+        with self._lock:
+            return self.loaded.pop(name, None) is not None
+
+    def _load(self, entry: dict):
+        """Builds an MvDB object on top of the shared spec data."""
+        if entry["catalogFile"] is not None:
+            rawHosts = load_catalog(
+                entry["catalogFile"],
+                entry["hostFile"],
+                self.groupFile,
+                self.defaultsFile
+            )["hosts"]
+        else:
+            with open(entry["hostFile"]) as f:
+                rawHosts = yaml.safe_load(f) or {}
+        hosts = LazyHosts(intern_tree(rawHosts), self.groups, self.defaults)
+        nr = Nornir(
+            inventory=Inventory(
+                hosts=hosts,
+                groups=self.groups,
+                defaults=self.defaults
+            ),
+            runner=load_runner(self.config),
+            config=self.config,
+            data=GlobalState(),
+        )
+
+        return MvDB(
+            hostFile=entry["hostFile"],
+            journalFile=entry["journalFile"],
+            nr=nr,
+            parser=self.parser
+        )
+
+
+def intern_tree(value):
+    """Interns every string in a parsed YAML tree, keys included.
+
+    Equal strings across every tree passed through this func then
+    share a single object (via sys.intern).
+
+    Args:
+      value:
+        Value returned via yaml.safe_load, or any subtree of it.
+
+    Returns:
+      An equal tree built from interned strings.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {intern_tree(k) : intern_tree(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [intern_tree(v) for v in value]
+
+    return value
@@ -0,0 +1,326 @@
+import csv
+import html
+
+from nornir.core.inventory import Host
+
+
+FOOTNOTES = (
+    ("*", "Steelbook®"),
+    ("†", "Has slipcover"),
+    ("‡", "Boutique label release"),
+    ("§", "Film presented in black & white"),
+    ("‖", "Animated feature"),
+)
+COLUMNS = (
+    "title",
+    "year",
+    "runtime",
+    "aspect_ratio",
+    "director",
+    "format",
+    "resolution",
+    "publisher",
+    "discs",
+    "footnotes",
+)
+GROUPINGS = ("format", "publisher", "decade")
+UNKNOWN_GROUP = "Unknown"
+
+
+class TextWriter:
+    """Writes report rows as the plain-text collection listing."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def header(self):
+        pass
+
+    def group(self, name: str):
+        self.stream.write(f"\n{name}\n{'-' * len(name)}\n")
+
+    def end_group(self):
+        pass
+
+    def row(self, row: dict):
+        self.stream.write(
+            f"{row['title']} ({row['year']}/{row['runtime']} min/"
+            f"{row['aspect_ratio']}:1/dir. {row['director']}) - "
+            f"[{row['format']}|{row['resolution']}p|{row['publisher']} "
+            f"({row['discs']})] {row['footnotes']}\n"
+        )
+
+    def footer(self, total: int):
+        self.stream.write(f"\nTotal number of titles: {total}\n\n")
+        self.stream.write(
+            "\n".join(f"{mark} {text}" for mark, text in FOOTNOTES) + "\n"
+        )
+
+
+class CsvWriter:
+    """Writes report rows as CSV, with a group column when grouped."""
+
+    def __init__(self, stream):
+        self.writer = csv.writer(stream)
+        self.groupName = None
+
+    def header(self):
+        self.writer.writerow(("group", *COLUMNS))
+
+    def group(self, name: str):
+        self.groupName = name
+
+    def end_group(self):
+        self.groupName = None
+
+    def row(self, row: dict):
+        self.writer.writerow((self.groupName, *(row[c] for c in COLUMNS)))
+
+    def footer(self, total: int):
+        pass
+
+
+class MarkdownWriter:
+    """Writes report rows as a Markdown table per group."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.open = False
+
+    def header(self):
+        pass
+
+    def group(self, name: str):
+        self.stream.write(f"\n### {name}\n\n")
+
+    def end_group(self):
+        self.open = False
+
+    def row(self, row: dict):
+        if not self.open:
+            self.stream.write(f"| {' | '.join(COLUMNS)} |\n")
+            self.stream.write(f"|{'---|' * len(COLUMNS)}\n")
+            self.open = True
+        cells = (_escape_md(str(row[c])) for c in COLUMNS)
+        self.stream.write(f"| {' | '.join(cells)} |\n")
+
+    def footer(self, total: int):
+        self.stream.write(f"\n**Total number of titles: {total}**\n\n")
+        for mark, text in FOOTNOTES:
+            self.stream.write(f"- {_escape_md(mark)} {text}\n")
+
+
+class HtmlWriter:
+    """Writes report rows as an HTML table per group."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.open = False
+
+    def header(self):
+        self.stream.write("<div class=\"mvdb-report\">\n")
+
+    def group(self, name: str):
+        self.stream.write(f"<h3>{html.escape(name)}</h3>\n")
+
+    def end_group(self):
+        self._table_close()
+
+    def row(self, row: dict):
+        if not self.open:
+            cells = "".join(f"<th>{c}</th>" for c in COLUMNS)
+            self.stream.write(f"<table>\n<tr>{cells}</tr>\n")
+            self.open = True
+        cells = "".join(
+            f"<td>{html.escape(str(row[c]))}</td>" for c in COLUMNS
+        )
+        self.stream.write(f"<tr>{cells}</tr>\n")
+
+    def footer(self, total: int):
+        self._table_close()
+        self.stream.write(f"<p>Total number of titles: {total}</p>\n")
+        self.stream.write("<ul>\n")
+        for mark, text in FOOTNOTES:
+            note = html.escape(f"{mark} {text}")
+            self.stream.write(f"<li>{note}</li>\n")
+        self.stream.write("</ul>\n</div>\n")
+
+    def _table_close(self):
+        if self.open:
+            self.stream.write("</table>\n")
+            self.open = False
+
+
+WRITERS = {
+    "text" : TextWriter,
+    "csv" : CsvWriter,
+    "md" : MarkdownWriter,
+    "html" : HtmlWriter,
+}
+
+
+def footnote_flags(host: Host):
+    """Precomputes the footnote marks for a movie.
+
+    Args:
+      host(Host):
+        Nornir host representing a single movie.
+
+    Returns:
+      String of footnote marks, as defined by FOOTNOTES.
+    """
+    flags = ""
+    if host["steelbook"]:
+        flags += "*"
+    elif host["slipcover"]:
+        flags += "†"
+    if host["boutique_release"]:
+        flags += "‡"
+    if not host["color"]:
+        flags += "§"
+    if host["animation"]:
+        flags += "‖"
+
+    return flags
+
+
+def group_value(host: Host, groupBy: str):
+    """Returns the value a movie is grouped under.
+
+    Args:
+      host(Host):
+        Nornir host representing a single movie.
+      groupBy(str):
+        One of GROUPINGS.
+
+    Returns:
+      The group name as a string, or UNKNOWN_GROUP if the movie has no
+      value to group on.
+    """
+    if groupBy == "format":
+        value = host.get("format")
+    elif groupBy == "publisher":
+        value = (host.get("release") or {}).get("publisher")
+    elif groupBy == "decade":
+        value = host.get("year")
+        if value is not None:
+            value = f"{value // 10 * 10}s"
+    else:
+        raise ValueError(
+            f'"{groupBy}" is not one of {", ".join(GROUPINGS)}.'
+        )
+
+    return UNKNOWN_GROUP if value is None else str(value)
+
+
+def render_row(host: Host):
+    """Renders a movie into a flat report row without modifying it.
+
+    Args:
+      host(Host):
+        Nornir host representing a single movie.
+
+    Returns:
+      Dict keyed by COLUMNS.
+    """
+    release = host["release"]
+    director = host["director"]
+    if isinstance(director, list):
+        director = " & ".join(director)
+    discs = release["discs"]
+
+    return {
+        "title" : host["title"],
+        "year" : host["year"],
+        "runtime" : host["runtime"],
+        "aspect_ratio" : release["aspect_ratio"],
+        "director" : director,
+        "format" : host["format"],
+        "resolution" : host["resolution"],
+        "publisher" : release["publisher"],
+        "discs" : f"{discs} Disc" if discs == 1 else f"{discs} Discs",
+        "footnotes" : footnote_flags(host),
+    }
+
+
+def write_report(
+    hosts: dict,
+    stream,
+    fmt: str="text",
+    groupBy: str=None,
+    page: int=None,
+    pageSize: int=50
+):
+    """Streams a collection report for hosts to stream.
+
+    Rows are rendered and written one at a time, so memory use does not
+    grow with the size of the collection. When grouping, the hosts are
+    bucketed by group in a single pass (holding references only) and
+    each group is then streamed in turn.
+
+    The footer's title count is the number of hosts reported on, even
+    when only a single page of them is written.
+
+    Args:
+      hosts(dict):
+        Nornir hosts to report on, e.g. MvDB.nr.filter(...).inventory
+        .hosts.
+      stream:
+        Writable text stream, e.g. sys.stdout or an open file.
+      fmt(str):
+        One of "text", "csv", "md" or "html". Defaults to "text".
+      groupBy(str):
+        Optional grouping, one of GROUPINGS. Defaults to None.
+      page(int):
+        Optional 1-based page number. Defaults to None, which writes
+        every row.
+      pageSize(int):
+        Rows per page when page is set. Defaults to 50.
+
+    Returns:
+      The number of rows written.
+    """
+    writer = WRITERS[fmt](stream)
+    if groupBy is None:
+        sections = [(None, hosts.values())]
+    else:
+        buckets = {}
+        for host in hosts.values():
+            buckets.setdefault(group_value(host, groupBy), []).append(host)
+        # Named groups in order, with UNKNOWN_GROUP last.
+        sections = sorted(
+            buckets.items(),
+            key=lambda bucket: (bucket[0] == UNKNOWN_GROUP, bucket[0])
+        )
+    start = 0 if page is None else (page - 1) * pageSize
+    stop = None if page is None else start + pageSize
+
+    writer.header()
+    total = 0
+    position = 0
+    for name, members in sections:
+        opened = False
+        for host in members:
+            if position < start:
+                position += 1
+                continue
+            if stop is not None and position >= stop:
+                break
+            if name is not None and not opened:
+                writer.group(name)
+                opened = True
+            writer.row(render_row(host))
+            position += 1
+            total += 1
+        if opened:
+            writer.end_group()
+        if stop is not None and position >= stop:
+            break
+    writer.footer(len(hosts))
+
+    return total
+
+
+def _escape_md(text: str):
+    """Escapes Markdown table & emphasis characters in text."""
+    return text.replace("|", "\\|").replace("*", "\\*")
@@ -0,0 +1,127 @@
+from configparser import ConfigParser
+
+from mvdb.data import import_boutiques
+
+
+# Order in which data.import_movies_csv appends groups to a movie.
+GROUP_ORDER = (
+    "4k_uhd",
+    "blu-ray",
+    "hdr10",
+    "hdr10_dv",
+    "black_white",
+    "animation",
+    "boutique",
+    "steelbook",
+    "slipcover",
+    "case_replacement",
+)
+# Movie fields that group rules match on, and how to read each one.
+FIELDS = {
+    "publisher" : lambda mv: (
+        (mv["data"].get("release") or {}).get("publisher")
+    ),
+}
+# Group name to (field, func returning the field values which qualify a
+# movie for the group, given tech_specs.ini).
+RULES = {
+    "boutique" : (
+        "publisher",
+        lambda parser: import_boutiques(parser, "boutiqueLabels"),
+    ),
+}
+
+
+def build_indexes(movieDict: dict, fields: list):
+    """Indexes the catalog by rule field value and by group in one pass.
+
+    Args:
+      movieDict(dict):
+        Movies in the same structure as archives/movies.yml. Only the
+        "groups" list and the fields read via FIELDS are needed.
+      fields(list):
+        Names of the FIELDS to index.
+
+    Returns:
+      Tuple of a dict of field name to {value : set of movie keys} (e.g.
+      a publisher -> movies index) and a dict of group name to a set of
+      movie keys.
+    """
+    fieldIndex = {field : {} for field in fields}
+    groupIndex = {}
+    for movie, mv in movieDict.items():
+        for field in fields:
+            value = FIELDS[field](mv)
+            fieldIndex[field].setdefault(value, set()).add(movie)
+        for group in mv.get("groups") or []:
+            groupIndex.setdefault(group, set()).add(movie)
+
+    return fieldIndex, groupIndex
+
+
+def derive_groups(movieDict: dict, parser: ConfigParser, rules: dict=RULES):
+    """Re-derives rule-based group membership over the catalog.
+
+    For each rule, the movies which should be in the group are looked up
+    through the field index and compared with its current members, so
+    the cost is one pass to build the indexes plus work proportional to
+    the titles affected.
+
+    Args:
+      movieDict(dict):
+        Movies in the same structure as archives/movies.yml.
+      parser(ConfigParser):
+        ConfigParser object which has already read tech_specs.ini.
+      rules(dict):
+        Group rules, in the format of RULES. Defaults to RULES.
+
+    Returns:
+      Dict of movie key to {"add" : [groups], "remove" : [groups]}, for
+      the movies whose groups change only.
+    """
+    fieldIndex, groupIndex = build_indexes(
+        movieDict,
+        list(dict.fromkeys(field for field, _ in rules.values()))
+    )
+    changes = {}
+    for group, (field, values) in rules.items():
+        wanted = set()
+        for value in values(parser):
+            wanted |= fieldIndex[field].get(value, set())
+        current = groupIndex.get(group, set())
+        for movie in wanted - current:
+            changes.setdefault(movie, {"add" : [], "remove" : []})
+            changes[movie]["add"].append(group)
+        for movie in current - wanted:
+            changes.setdefault(movie, {"add" : [], "remove" : []})
+            changes[movie]["remove"].append(group)
+
+    return changes
+
+
+def apply_group_changes(groups: list, change: dict):
+    """Returns a movie's new groups list with a change applied.
+
+    Added groups are inserted at the position data.import_movies_csv
+    would have given them, per GROUP_ORDER.
+
+    Args:
+      groups(list):
+        The movie's current groups.
+      change(dict):
+        A single movie's entry returned via the derive_groups func.
+
+    Returns:
+      The new groups list; groups is not modified.
+    """
+    newGroups = [g for g in groups or [] if g not in change["remove"]]
+    rank = {group : i for i, group in enumerate(GROUP_ORDER)}
+    for group in change["add"]:
+        position = len(newGroups)
+        for i, existing in enumerate(newGroups):
+            if rank.get(existing, len(rank)) > rank.get(group, len(rank)):
+                position = i
+                break
+        newGroups.insert(position, group)
+
+    return newGroups
@@ -0,0 +1,183 @@
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import re
+import yaml
+
+from mvdb.data import dump_movies_yaml
+
+
+MANIFEST = "manifest.json"
+SHARD_VERSION = 1
+
+
+def dump_movies_shards(
+    movieDict: dict,
+    by: str="prefix",
+    shardSize: int=500,
+    prefixLength: int=1
+):
+    """Splits a sorted catalog into YAML shards for Nornir.
+
+    With by="prefix", movies are grouped by the first prefixLength
+    characters of their sort_key, so adding or editing a title only
+    changes the shard for its prefix. Characters other than a-z and 0-9
+    are hex-escaped in the shard name, so every prefix gets its own
+    shard. With by="size", the catalog is cut into consecutive shards of
+    shardSize movies.
+
+    Args:
+      movieDict(dict):
+        Sorted dict of movies, e.g. returned via data.sort_catalog.
+      by(str):
+        Either "prefix" or "size". Defaults to "prefix".
+      shardSize(int):
+        Movies per shard when by="size". Defaults to 500.
+      prefixLength(int):
+        sort_key prefix length when by="prefix". Defaults to 1.
+
+    Returns:
+      Dict of shard file name to the shard's YAML blob (as returned via
+      data.dump_movies_yaml), in catalog order.
+    """
+    shards = {}
+    for i, movie in enumerate(movieDict):
+        if by == "prefix":
+            prefix = movieDict[movie]["sort_key"][:prefixLength].lower()
+            name = f"movies-{_escape_prefix(prefix)}.yml"
+        elif by == "size":
+            name = f"movies-{i // shardSize:04d}.yml"
+        else:
+            raise ValueError(f'"{by}" is not a valid shard layout.')
+        shards.setdefault(name, {})[movie] = movieDict[movie]
+
+    return {name : dump_movies_yaml(mvs) for name, mvs in shards.items()}
+
+
+def export_movies_shards(
+    shardBlobs: dict,
+    shardDir: str,
+    metadata: dict=None
+):
+    """Writes YAML shards and their manifest, skipping unchanged shards.
+
+    Each shard's digest is compared with the one recorded in the
+    existing manifest; only new or changed shards are written and shards
+    no longer in the layout are removed. Files are replaced atomically
+    and the manifest is written last, so readers never see a partial
+    shard or a manifest referencing a missing one.
+
+    Args:
+      shardBlobs(dict):
+        Shard file name to YAML blob, as returned via the
+        dump_movies_shards func.
+      shardDir(str):
+        Directory holding the shards and manifest.
+      metadata(dict):
+        Optional JSON-serializable metadata stored in the manifest.
+        Defaults to None.
+
+    Returns:
+      List of shard file names which were written.
+    """
+    os.makedirs(shardDir, exist_ok=True)
+    old = {s["file"] : s["sha256"] for s in read_manifest(shardDir)["shards"]}
+    written = []
+    shards = []
+    for name, blob in shardBlobs.items():
+        digest = hashlib.sha256(blob.encode()).hexdigest()
+        path = os.path.join(shardDir, name)
+        if old.get(name) != digest or not os.path.exists(path):
+            with open(f"{path}.tmp", "w") as f:
+                f.write(blob)
+            os.replace(f"{path}.tmp", path)
+            written.append(name)
+        shards.append({"file" : name, "sha256" : digest})
+
+    manifest = {
+        "version" : SHARD_VERSION,
+        "metadata" : metadata or {},
+        "shards" : shards,
+    }
+    tmpFile = os.path.join(shardDir, f"{MANIFEST}.tmp")
+    with open(tmpFile, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmpFile, os.path.join(shardDir, MANIFEST))
+    for name in old.keys() - shardBlobs.keys():
+        try:
+            os.remove(os.path.join(shardDir, name))
+        except FileNotFoundError:
+            pass
+
+    return written
+
+
+def load_movies_shards(shardDir: str, workers: int=None):
+    """Parses every shard listed in the manifest concurrently.
+
+    Shards are parsed in a process pool, so load time scales with the
+    number of cores rather than the size of the catalog, and are then
+    assembled into one dict and stably sorted by sort_key. As the
+    catalog is sorted by sort_key, this restores catalog order even
+    when a prefix's titles are not contiguous in it.
+
+    Args:
+      shardDir(str):
+        Directory holding the shards and manifest.
+      workers(int):
+        Number of worker processes. Defaults to None, which uses the
+        number of CPUs. A value of 1 parses in-process.
+
+    Returns:
+      Dict of movies, as yaml.safe_load returns for archives/movies.yml.
+    """
+    files = [
+        os.path.join(shardDir, s["file"])
+        for s in read_manifest(shardDir)["shards"]
+    ]
+    movies = {}
+    if workers == 1 or len(files) < 2:
+        for shard in map(_load_shard, files):
+            movies.update(shard)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for shard in pool.map(_load_shard, files):
+                movies.update(shard)
+
+    return {
+        movie : movies[movie]
+        for movie in sorted(movies, key=lambda m: movies[m]["sort_key"])
+    }
+
+
+def read_manifest(shardDir: str):
+    """Reads a shard directory's manifest.
+
+    Args:
+      shardDir(str):
+        Directory holding the shards and manifest.
+
+    Returns:
+      The manifest dict, or an empty manifest if none exists yet.
+    """
+    try:
+        with open(os.path.join(shardDir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version" : SHARD_VERSION, "metadata" : {}, "shards" : []}
+
+
+def _load_shard(shardFile: str):
+    """Parses a single shard; runs in a worker process."""
+    with open(shardFile) as f:
+        return yaml.safe_load(f) or {}
+
+
+def _escape_prefix(prefix: str):
+    """Makes a sort_key prefix file-name safe without collisions.
+
+    Characters other than a-z and 0-9 become "_<hex code point>_", so
+    distinct prefixes always map to distinct names.
+    """
+    return re.sub(r"[^a-z0-9]", lambda m: f"_{ord(m.group()):x}_", prefix)
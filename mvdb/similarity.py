@@ -0,0 +1,252 @@
+from configparser import ConfigParser
+import heapq
+import json
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from mvdb.data import import_current_genres
+
+
+CREW_ROLES = (
+    "writer",
+    "cinematographer",
+    "prod_designer",
+    "composer",
+    "editor",
+)
+BLOCK_BYTES = 1 << 26
+
+
+class SimilarityIndex:
+    """Finds similar movies via packed feature bit vectors.
+
+    Each movie is encoded as a bit vector over a shared vocabulary: the
+    genres, subgenres, descriptors, aspect ratios and MPAA ratings from
+    tech_specs.ini, plus the movie's group tags, decade, director and
+    crew (one bit per person). Similarity is the Jaccard index of two
+    vectors, i.e. popcount(a & b) / popcount(a | b).
+
+    If NumPy is installed the vectors are packed into a uint8 matrix and
+    scored in batches; otherwise each vector is a Python int and scored
+    with int.bit_count.
+    """
+
+    def __init__(
+        self,
+        movieDict: dict,
+        parser: ConfigParser,
+        useNumpy: bool=None
+    ):
+        """Encodes every movie in movieDict.
+
+        Args:
+          movieDict(dict):
+            The movie catalog imported using the yaml.safe_load func.
+          parser(ConfigParser):
+            ConfigParser object which has already read tech_specs.ini.
+          useNumpy(bool):
+            Whether to score with NumPy. Defaults to None, which uses
+            NumPy if it is installed.
+        """
+        self.useNumpy = np is not None if useNumpy is None else useNumpy
+        if self.useNumpy and np is None:
+            raise ImportError("NumPy is not installed.")
+        self.features = {}
+        for genre in import_current_genres(parser, "summary"):
+            self._bit("genre", genre)
+        for ratio in parser.get("summary", "aspect_ratios").split(","):
+            self._bit("aspect_ratio", float(ratio))
+        for rating in parser.get("summary", "mpaa_ratings").split(","):
+            self._bit("mpaa", rating.upper())
+
+        self.keys = list(movieDict)
+        self.rows = {key : i for i, key in enumerate(self.keys)}
+        self.vectors = [self.encode(mv) for mv in movieDict.values()]
+        self.counts = [v.bit_count() for v in self.vectors]
+        if self.useNumpy:
+            width = (len(self.features) + 7) // 8
+            self.matrix = np.frombuffer(
+                b"".join(v.to_bytes(width, "little") for v in self.vectors),
+                dtype=np.uint8
+            ).reshape(len(self.vectors), width)
+            self.matrixCounts = np.array(self.counts, dtype=np.int64)
+
+    def encode(self, movie: dict):
+        """Encodes a movie as an int bit vector over the vocabulary.
+
+        People and group tags not seen before are added to the
+        vocabulary.
+
+        Args:
+          movie(dict):
+            A single movie entry, as found in archives/movies.yml.
+
+        Returns:
+          The bit vector as an int.
+        """
+        data = movie["data"]
+        vector = 0
+        for group in movie.get("groups") or []:
+            vector |= self._bit("group", group)
+        for genre in data.get("genres") or []:
+            vector |= self._bit("genre", genre)
+        if data.get("year") is not None:
+            vector |= self._bit("decade", data["year"] // 10 * 10)
+        release = data.get("release") or {}
+        if release.get("aspect_ratio") is not None:
+            vector |= self._bit("aspect_ratio", release["aspect_ratio"])
+        if (data.get("mpaa") or {}).get("rating") is not None:
+            vector |= self._bit("mpaa", data["mpaa"]["rating"])
+        crew = data.get("crew") or {}
+        for names in (data.get("director"), *map(crew.get, CREW_ROLES)):
+            if isinstance(names, str):
+                names = [names]
+            for name in names or []:
+                vector |= self._bit("person", name)
+
+        return vector
+
+    def neighbors(self, key: str, k: int=10):
+        """Finds the k movies most similar to key.
+
+        Args:
+          key(str):
+            The movie key.
+          k(int):
+            Number of neighbors to return. Defaults to 10.
+
+        Returns:
+          List of (movie key, score) tuples, best match first. Ties are
+          broken by catalog order.
+        """
+        return self._top_k([self.rows[key]], k)[0]
+
+    def precompute(self, k: int=10):
+        """Finds the k nearest neighbors of every movie.
+
+        With NumPy, query rows are scored against the whole catalog in
+        blocks sized to keep the intermediate arrays under 64MB.
+
+        Args:
+          k(int):
+            Number of neighbors per movie. Defaults to 10.
+
+        Returns:
+          Dict of movie key to its neighbors, as returned via the
+          neighbors method.
+        """
+        rows = list(range(len(self.keys)))
+        step = 1
+        if self.useNumpy:
+            step = max(1, BLOCK_BYTES // max(1, self.matrix.size))
+        results = {}
+        for i in range(0, len(rows), step):
+            block = rows[i:i + step]
+            for row, found in zip(block, self._top_k(block, k)):
+                results[self.keys[row]] = found
+
+        return results
+
+    def _bit(self, kind: str, value):
+        """Returns the bit for a feature, adding it to the vocabulary."""
+        feature = (kind, value)
+        if feature not in self.features:
+            self.features[feature] = len(self.features)
+
+        return 1 << self.features[feature]
+
+    def _scores(self, rows: list):
+        """Jaccard scores of each row against every movie."""
+        if not self.useNumpy:
+            scores = []
+            for row in rows:
+                query = self.vectors[row]
+                count = self.counts[row]
+                line = []
+                for vector, other in zip(self.vectors, self.counts):
+                    inter = (query & vector).bit_count()
+                    union = count + other - inter
+                    line.append(inter / union if union else 0.0)
+                scores.append(line)
+            return scores
+
+        queries = self.matrix[rows]
+        anded = queries[:, None, :] & self.matrix[None, :, :]
+        inter = _popcount(anded).sum(axis=2, dtype=np.int64)
+        union = self.matrixCounts[rows][:, None] + self.matrixCounts - inter
+
+        return np.divide(
+            inter,
+            union,
+            out=np.zeros(inter.shape),
+            where=union > 0
+        )
+
+    def _top_k(self, rows: list, k: int):
+        """Top k (key, score) pairs for each row, excluding itself."""
+        results = []
+        for row, line in zip(rows, self._scores(rows)):
+            if self.useNumpy:
+                line[row] = -1.0
+                order = np.lexsort((np.arange(len(line)), -line))
+                best = order[:min(k, len(line) - 1)].tolist()
+                line = line.tolist()
+            else:
+                best = heapq.nsmallest(
+                    k,
+                    (i for i in range(len(line)) if i != row),
+                    key=lambda i: (-line[i], i)
+                )
+            results.append([(self.keys[i], line[i]) for i in best])
+
+        return results
+
+
+def load_neighbors(file: str):
+    """Reads precomputed neighbors written via the save_neighbors func.
+
+    Args:
+      file(str):
+        JSON file of precomputed neighbors.
+
+    Returns:
+      Dict of movie key to a list of (movie key, score) tuples.
+    """
+    with open(file) as f:
+        neighbors = json.load(f)
+
+    return {k : [tuple(n) for n in v] for k, v in neighbors.items()}
+
+
+def save_neighbors(neighbors: dict, file: str):
+    """Writes precomputed neighbors to a JSON file.
+
+    Args:
+      neighbors(dict):
+        Neighbors returned via SimilarityIndex.precompute.
+      file(str):
+        The JSON file to write.
+
+    Returns:
+      None
+    """
+    with open(file, "w") as f:
+        json.dump(neighbors, f)
+
+
+def _popcount(array):
+    """Per-byte popcount of a uint8 NumPy array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(array)
+
+    return _POPCOUNT_TABLE[array]
+
+
+if np is not None:
+    _POPCOUNT_TABLE = np.array(
+        [bin(i).count("1") for i in range(256)],
+        dtype=np.uint8
+    )
@@ -0,0 +1,319 @@
+from collections.abc import Mapping
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+import yaml
+
+
+MAGIC = b"MVDBSNAP"
+SNAPSHOT_VERSION = 2
+NUMERIC_COLUMNS = (
+    ("year", "i"),
+    ("runtime", "i"),
+    ("discs", "i"),
+    ("certificate", "i"),
+    ("upc", "q"),
+    ("aspect_ratio", "d"),
+)
+STRING_COLUMNS = (
+    "key",
+    "title",
+    "sort_key",
+    "publisher",
+    "groups",
+    "record",
+)
+HEADER = struct.Struct(
+    "<8sIIQQQ" + "Q" * (len(NUMERIC_COLUMNS) + len(STRING_COLUMNS) + 2)
+)
+
+
+class Snapshot(Mapping):
+    """Immutable, memory-mapped view of a snapshot file.
+
+    The file is mapped read-only, so every process that opens the same
+    snapshot shares one physical copy via the page cache and opening it
+    costs the same regardless of catalog size. Numeric columns are
+    exposed as memoryview casts over the map (no copying) and key
+    lookups go through the on-disk hash table.
+
+    A Snapshot is a read-only Mapping of movie key to the movie dict in
+    the same structure as archives/movies.yml, so it can stand in for
+    the parsed host file. Movie dicts are decoded from the string heap
+    on each access; each movie's groups are also stored as a column of
+    their own, so filtering by group never decodes a movie.
+    """
+
+    def __init__(self, snapshotFile: str):
+        """Maps snapshotFile into memory and validates its header.
+
+        Args:
+          snapshotFile(str):
+            Snapshot file written via the build_snapshot func.
+        """
+        if sys.byteorder != "little":
+            raise ValueError("Snapshots require a little-endian host.")
+        with open(snapshotFile, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._views = [self._view]
+        fields = HEADER.unpack_from(self._view)
+        magic, version, self.rows, tableSize, metaOffset, metaLen = fields[:6]
+        if magic != MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(
+                f'"{snapshotFile}" is not a v{SNAPSHOT_VERSION} snapshot.'
+            )
+        offsets = iter(fields[6:])
+        self._columns = {}
+        for name, code in NUMERIC_COLUMNS:
+            start = next(offsets)
+            end = start + self.rows * struct.calcsize(code)
+            self._columns[name] = self._view[start:end].cast(code)
+        self._strings = {}
+        for name in STRING_COLUMNS:
+            start = next(offsets)
+            end = start + self.rows * 16
+            self._strings[name] = self._view[start:end].cast("Q")
+        start = next(offsets)
+        self._table = self._view[start:start + tableSize * 4].cast("I")
+        self._heap = self._view[next(offsets):]
+        self._views.extend(self._columns.values())
+        self._views.extend(self._strings.values())
+        self._views.extend((self._table, self._heap))
+        meta = self._heap[metaOffset:metaOffset + metaLen]
+        self.metadata = json.loads(str(meta, "utf-8"))
+        meta.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getitem__(self, key: str):
+        return self.movie(self.row(key))
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield self.string("key", row)
+
+    def __len__(self):
+        return self.rows
+
+    def __contains__(self, key: object):
+        return isinstance(key, str) and self._find(key) is not None
+
+    def close(self):
+        """Releases the memoryviews and unmaps the file.
+
+        Any memoryview previously returned via the raw or column methods
+        must be released first.
+        """
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def column(self, name: str):
+        """Returns a zero-copy memoryview of a fixed-width numeric column.
+
+        Missing values are stored as 0 for integer columns and NaN for
+        aspect_ratio.
+
+        Args:
+          name(str):
+            One of the names in NUMERIC_COLUMNS.
+
+        Returns:
+          memoryview indexed by row.
+        """
+        return self._columns[name]
+
+    def groups(self):
+        """Maps every movie key to its groups without decoding records.
+
+        Returns:
+          Dict of movie key to its list of group names, in row order.
+        """
+        groups = {}
+        for row in range(self.rows):
+            names = self.string("groups", row)
+            key = self.string("key", row)
+            groups[key] = names.split("\n") if names else []
+
+        return groups
+
+    def movie(self, row: int):
+        """Decodes the full movie dict stored for row."""
+        return json.loads(self.string("record", row))
+
+    def raw(self, column: str, row: int):
+        """Returns a zero-copy memoryview of a string column's bytes."""
+        refs = self._strings[column]
+
+        return self._heap[refs[2 * row]:refs[2 * row + 1]]
+
+    def row(self, key: str):
+        """Finds a movie's row number via the hash table.
+
+        Args:
+          key(str):
+            The movie key.
+
+        Returns:
+          Row number of the movie.
+
+        Raises:
+          KeyError if the key is not in the snapshot.
+        """
+        row = self._find(key)
+        if row is None:
+            raise KeyError(key)
+
+        return row
+
+    def string(self, column: str, row: int):
+        """Decodes a string column value for row."""
+        return str(self.raw(column, row), "utf-8")
+
+    def _find(self, key: str):
+        keyBytes = key.encode()
+        mask = len(self._table) - 1
+        slot = zlib.crc32(keyBytes) & mask
+        while True:
+            entry = self._table[slot]
+            if entry == 0:
+                return None
+            if self.raw("key", entry - 1) == keyBytes:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+
+def build_snapshot(
+    movieDict: dict,
+    snapshotFile: str,
+    metadata: dict=None
+):
+    """Writes an immutable snapshot of the catalog.
+
+    The snapshot is written to a temporary file and moved into place
+    with os.replace, so processes holding the previous snapshot open
+    keep their mapping intact.
+
+    Args:
+      movieDict(dict):
+        The entire movie catalog imported using the yaml.safe_load func.
+      snapshotFile(str):
+        The file name of the resulting snapshot.
+      metadata(dict):
+        Optional JSON-serializable metadata stored with the snapshot.
+        Defaults to None.
+
+    Returns:
+      None
+    """
+    rows = len(movieDict)
+    tableSize = 1
+    while tableSize < rows * 2:
+        tableSize *= 2
+    heap = bytearray()
+    meta = json.dumps(metadata or {}).encode()
+    metaOffset = len(heap)
+    heap += meta
+    numeric = {name : [] for name, _ in NUMERIC_COLUMNS}
+    strings = {name : [] for name in STRING_COLUMNS}
+    table = [0] * tableSize
+    for row, (key, mv) in enumerate(movieDict.items()):
+        data = mv["data"]
+        release = data.get("release") or {}
+        mpaa = data.get("mpaa") or {}
+        numeric["year"].append(data.get("year") or 0)
+        numeric["runtime"].append(data.get("runtime") or 0)
+        numeric["discs"].append(release.get("discs") or 0)
+        numeric["certificate"].append(mpaa.get("certificate") or 0)
+        numeric["upc"].append(release.get("upc") or 0)
+        aspectRatio = release.get("aspect_ratio")
+        numeric["aspect_ratio"].append(
+            math.nan if aspectRatio is None else aspectRatio
+        )
+        values = {
+            "key" : key,
+            "title" : data.get("title") or "",
+            "sort_key" : mv.get("sort_key") or "",
+            "publisher" : release.get("publisher") or "",
+            "groups" : "\n".join(mv.get("groups") or []),
+        }
+        for name, value in values.items():
+            strings[name].append(_append(heap, value.encode()))
+        strings["record"].append(
+            _append(heap, json.dumps(mv, separators=(",", ":")).encode())
+        )
+        slot = zlib.crc32(key.encode()) & (tableSize - 1)
+        while table[slot]:
+            slot = (slot + 1) & (tableSize - 1)
+        table[slot] = row + 1
+
+    sections = []
+    for name, code in NUMERIC_COLUMNS:
+        sections.append(struct.pack(f"<{rows}{code}", *numeric[name]))
+    for name in STRING_COLUMNS:
+        refs = [n for ref in strings[name] for n in ref]
+        sections.append(struct.pack(f"<{2 * rows}Q", *refs))
+    sections.append(struct.pack(f"<{tableSize}I", *table))
+    sections.append(bytes(heap))
+
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        position += -position % 8
+        offsets.append(position)
+        position += len(section)
+    tmpFile = f"{snapshotFile}.tmp"
+    with open(tmpFile, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC,
+            SNAPSHOT_VERSION,
+            rows,
+            tableSize,
+            metaOffset,
+            len(meta),
+            *offsets
+        ))
+        for offset, section in zip(offsets, sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(section)
+    os.replace(tmpFile, snapshotFile)
+
+
+def export_snapshot(hostFile: str, snapshotFile: str, metadata: dict=None):
+    """Builds a snapshot from a Nornir host file.
+
+    Args:
+      hostFile(str):
+        Nornir host file, e.g. "archives/movies.yml".
+      snapshotFile(str):
+        The file name of the resulting snapshot.
+      metadata(dict):
+        Optional JSON-serializable metadata stored with the snapshot.
+        Defaults to None.
+
+    Returns:
+      None
+    """
+    with open(hostFile) as f:
+        movies = yaml.safe_load(f) or {}
+    build_snapshot(movies, snapshotFile, metadata)
+
+
+def _append(heap: bytearray, value: bytes):
+    """Appends value to the heap, returning its (start, end) offsets."""
+    start = len(heap)
+    heap += value
+
+    return (start, len(heap))
@@ -0,0 +1,88 @@
+from collections import Counter
+
+from nornir.core.inventory import Host
+
+
+class CatalogStats:
+    """Collection rollups maintained incrementally alongside MvDB.
+
+    Aggregates are built in a single pass over the inventory at load
+    and then adjusted per movie as titles are added, overwritten or
+    removed, so reading them never triggers a catalog scan.
+
+    Group counts follow the same inheritance as MvDB.filter_group: a
+    movie in "hdr10_dv" also counts towards its parent group "4k_uhd".
+    """
+
+    def __init__(self):
+        self.titles = 0
+        self.runtime = 0
+        self.discs = 0
+        self.groups = Counter()
+        self.genres = Counter()
+        self.publishers = Counter()
+        self.decades = Counter()
+
+    @classmethod
+    def from_hosts(cls, hosts: dict):
+        """Builds rollups for every movie in hosts in a single pass.
+
+        Args:
+          hosts(dict):
+            Nornir hosts, e.g. MvDB.inventory.hosts.
+
+        Returns:
+          CatalogStats object.
+        """
+        stats = cls()
+        for host in hosts.values():
+            stats.add(host)
+
+        return stats
+
+    def add(self, host: Host):
+        """Adds a movie's contribution to the rollups."""
+        self._apply(host, 1)
+
+    def remove(self, host: Host):
+        """Removes a movie's contribution from the rollups."""
+        self._apply(host, -1)
+
+    def replace(self, old: Host, new: Host):
+        """Swaps an overwritten movie's contribution for its new one."""
+        self._apply(old, -1)
+        self._apply(new, 1)
+
+    def summary(self):
+        """Returns the current rollups.
+
+        Returns:
+          Dict with "titles", "runtime", "discs" and "boutique_share"
+          values and "groups", "genres", "publishers" and "decades"
+          count dicts (sorted by descending count).
+        """
+        share = self.groups["boutique"] / self.titles if self.titles else 0.0
+
+        return {
+            "titles" : self.titles,
+            "runtime" : self.runtime,
+            "discs" : self.discs,
+            "boutique_share" : share,
+            "groups" : dict(+self.groups),
+            "genres" : dict((+self.genres).most_common()),
+            "publishers" : dict((+self.publishers).most_common()),
+            "decades" : dict(sorted((+self.decades).items())),
+        }
+
+    def _apply(self, host: Host, sign: int):
+        release = host["release"] or {}
+        self.titles += sign
+        self.runtime += sign * (host["runtime"] or 0)
+        self.discs += sign * (release.get("discs") or 0)
+        for group in host.extended_groups():
+            self.groups[group.name] += sign
+        for genre in host.data.get("genres") or []:
+            self.genres[genre] += sign
+        self.publishers[release.get("publisher")] += sign
+        if host["year"] is not None:
+            self.decades[f"{host['year'] // 10 * 10}s"] += sign
@@ -0,0 +1,681 @@
+from configparser import ConfigParser
+import json
+import os
+import sqlite3
+import yaml
+
+from mvdb.data import dump_movies_yaml, export_movies_yaml, write_barcodes
+from mvdb.tools import HEADER
+
+
+BATCH_SIZE = 500
+CREW_ROLES = (
+    "writer",
+    "cinematographer",
+    "prod_designer",
+    "composer",
+    "editor",
+)
+DATA_KEYS = (
+    "title",
+    "year",
+    "runtime",
+    "director",
+    "crew",
+    "release",
+    "mpaa",
+    "genres",
+)
+MPAA_LISTS = ("reason", "distributor", "alt_title")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    key TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    year INTEGER,
+    runtime INTEGER,
+    sort_key TEXT NOT NULL,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS release (
+    movie TEXT PRIMARY KEY REFERENCES movies(key) ON DELETE CASCADE,
+    publisher TEXT,
+    upc INTEGER,
+    discs INTEGER,
+    aspect_ratio REAL
+);
+CREATE TABLE IF NOT EXISTS mpaa (
+    movie TEXT PRIMARY KEY REFERENCES movies(key) ON DELETE CASCADE,
+    certificate INTEGER,
+    rating TEXT,
+    reason TEXT,
+    distributor TEXT,
+    alt_title TEXT
+);
+CREATE TABLE IF NOT EXISTS genres (
+    movie TEXT NOT NULL REFERENCES movies(key) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    genre TEXT NOT NULL,
+    PRIMARY KEY (movie, position)
+);
+CREATE TABLE IF NOT EXISTS movie_groups (
+    movie TEXT NOT NULL REFERENCES movies(key) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    group_name TEXT NOT NULL,
+    PRIMARY KEY (movie, position)
+);
+CREATE TABLE IF NOT EXISTS crew (
+    movie TEXT NOT NULL REFERENCES movies(key) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    is_list INTEGER NOT NULL,
+    PRIMARY KEY (movie, role, position)
+);
+CREATE INDEX IF NOT EXISTS idx_movies_sort_key ON movies(sort_key);
+CREATE INDEX IF NOT EXISTS idx_movies_year ON movies(year);
+CREATE INDEX IF NOT EXISTS idx_release_publisher ON release(publisher);
+CREATE INDEX IF NOT EXISTS idx_release_upc ON release(upc);
+CREATE INDEX IF NOT EXISTS idx_genres_genre ON genres(genre);
+CREATE INDEX IF NOT EXISTS idx_movie_groups_group ON movie_groups(group_name);
+CREATE INDEX IF NOT EXISTS idx_crew_name ON crew(name);
+"""
+
+
+def connect(dbFile: str="archives/movies.db"):
+    """Opens the SQLite catalog, creating the schema if needed.
+
+    The connection is switched to WAL journaling so readers (e.g. the
+    MvDBInventory plugin) are never blocked by a writer, and foreign
+    keys are enforced so deleting a movie cascades to its child rows.
+
+    Args:
+      dbFile(str):
+        The SQLite database file. Defaults to "archives/movies.db".
+
+    Returns:
+      sqlite3.Connection to the catalog.
+    """
+    conn = sqlite3.connect(dbFile)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+
+    return conn
+
+
+def connect_rc(dbFile: str="archives/movies.db", rcFile: str=None):
+    """Opens a release candidate copy of the SQLite catalog.
+
+    dbFile is copied to rcFile via the SQLite backup API, replacing any
+    earlier candidate, and a connection to the copy is returned. Edits
+    made through it leave dbFile untouched, so the database keeps
+    matching movies.yml until the candidate is accepted by renaming
+    rcFile over dbFile, alongside the other release candidate files.
+
+    Args:
+      dbFile(str):
+        The SQLite catalog. Defaults to "archives/movies.db".
+      rcFile(str):
+        The release candidate copy. Defaults to dbFile + ".rc".
+
+    Returns:
+      sqlite3.Connection to the release candidate.
+    """
+    if rcFile is None:
+        rcFile = dbFile + ".rc"
+    for stale in (rcFile, f"{rcFile}-wal", f"{rcFile}-shm"):
+        if os.path.exists(stale):
+            os.remove(stale)
+    src = sqlite3.connect(dbFile)
+    dst = sqlite3.connect(rcFile)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+    return connect(rcFile)
+
+
+def add_movies(
+    conn: sqlite3.Connection,
+    newMovies: dict,
+    overwrite: bool=False,
+    batchSize: int=BATCH_SIZE,
+    header: str=HEADER
+):
+    """Bulk upserts new movies into the SQLite catalog.
+
+    SQL counterpart to the data.add_movies func. Existing keys are
+    looked up through the movies primary key rather than a scan of the
+    catalog. Duplicates are skipped unless overwrite is True, in which
+    case the existing rows (and, by cascade, their child rows) are
+    replaced. Rows are written via executemany in transactions of
+    batchSize movies.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      newMovies(dict):
+        New films to be added to the catalog imported using the
+        mvdb.import_movies_csv func.
+      overwrite(bool):
+        Boolean which defines how to handle duplicate imports. Defaults
+        to False.
+      batchSize(int):
+        Number of movies written per transaction. Defaults to 500.
+      header(str):
+        Section break header.
+
+    Returns:
+      A dict with "added", "overwritten" and "skipped" lists of keys.
+    """
+    print(
+        f"\n{header}\n"
+        "\nAdding new movies...\n"
+    )
+    summary = {"added" : [], "overwritten" : [], "skipped" : []}
+    keys = list(newMovies.keys())
+    for i in range(0, len(keys), batchSize):
+        batch = keys[i:i + batchSize]
+        existing = fetch_existing_keys(conn, batch)
+        if overwrite:
+            summary["overwritten"].extend(k for k in batch if k in existing)
+            summary["added"].extend(k for k in batch if k not in existing)
+        else:
+            summary["skipped"].extend(k for k in batch if k in existing)
+            summary["added"].extend(k for k in batch if k not in existing)
+            batch = [k for k in batch if k not in existing]
+        with conn:
+            if overwrite and existing:
+                conn.executemany(
+                    "DELETE FROM movies WHERE key = ?",
+                    [(k,) for k in existing]
+                )
+            _insert_movies(conn, {k : newMovies[k] for k in batch})
+
+    print(
+        f'{len(summary["added"])} added, '
+        f'{len(summary["overwritten"])} overwritten, '
+        f'{len(summary["skipped"])} skipped.'
+    )
+    print("\n--Import complete.")
+
+    return summary
+
+
+def delete_movies(conn: sqlite3.Connection, keys: list):
+    """Deletes movies and, by cascade, their child rows.
+
+    Keys not in the catalog are ignored.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      keys(list):
+        Movie keys to delete.
+
+    Returns:
+      None
+    """
+    with conn:
+        conn.executemany(
+            "DELETE FROM movies WHERE key = ?",
+            [(key,) for key in keys]
+        )
+
+
+def export_barcodes_ini(
+    conn: sqlite3.Connection,
+    iniFile: str="archives/barcodes.ini",
+    dataHeader: str="barcodes"
+):
+    """Writes the catalog's UPCs to INI file in barcodes.ini format.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      iniFile(str):
+        The name of the ini file written by this method. Defaults
+        to "archives/barcodes.ini".
+      dataHeader(str):
+        Section header for barcode data in resulting INI file.
+
+    Returns:
+      None
+    """
+    rows = conn.execute(
+        "SELECT m.key, r.upc FROM movies m JOIN release r ON r.movie = m.key "
+        "ORDER BY m.sort_key, m.key"
+    )
+    movies = {
+        key : {"data" : {"release" : {"upc" : upc}}} for key, upc in rows
+    }
+    write_barcodes(movies, iniFile, dataHeader)
+
+
+def export_movies(conn: sqlite3.Connection, fileName: str):
+    """Writes the catalog to a Nornir host file.
+
+    The output is identical to running the data.dump_movies_yaml func
+    over a sorted catalog, so Nornir consumers are unaffected.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      fileName(str):
+        The file name for the resulting YAML document.
+
+    Returns:
+      None
+    """
+    export_movies_yaml(dump_movies_yaml(fetch_movies(conn)), fileName)
+
+
+def fetch_existing_keys(conn: sqlite3.Connection, keys: list):
+    """Returns the subset of keys already present in the catalog.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      keys(list):
+        Movie keys to look up.
+
+    Returns:
+      Set of keys found in the movies table.
+    """
+    existing = set()
+    for i in range(0, len(keys), BATCH_SIZE):
+        chunk = keys[i:i + BATCH_SIZE]
+        marks = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT key FROM movies WHERE key IN ({marks})", chunk
+        )
+        existing.update(row[0] for row in rows)
+
+    return existing
+
+
+def fetch_movies(conn: sqlite3.Connection, keys: list=None):
+    """Reassembles catalog rows into the movies.yml dict structure.
+
+    Movies are returned in sort_key order. Each movie dict has the same
+    keys, key order and value types (scalar vs list vs None) as the
+    YAML it was imported from.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      keys(list):
+        Optional list of movie keys to fetch. Defaults to None, which
+        fetches the entire catalog.
+
+    Returns:
+      Sorted dict of movies keyed by movie key.
+    """
+    if keys is None:
+        return _assemble(conn, "", [])
+
+    movies = {}
+    for i in range(0, len(keys), BATCH_SIZE):
+        chunk = keys[i:i + BATCH_SIZE]
+        marks = ",".join("?" * len(chunk))
+        movies.update(_assemble(conn, f"IN ({marks})", chunk))
+
+    return dict(
+        sorted(movies.items(), key=lambda kv: (kv[1]["sort_key"], kv[0]))
+    )
+
+
+def fetch_publishers_groups(conn: sqlite3.Connection):
+    """Reads every movie's publisher and groups, without the other data.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+
+    Returns:
+      Dict of movie key to a partial movie dict with only "groups" and
+      "data.release.publisher" set, in the structure rules.derive_groups
+      expects.
+    """
+    movies = {
+        key : {"groups" : [], "data" : {"release" : {"publisher" : pub}}}
+        for key, pub in conn.execute("SELECT movie, publisher FROM release")
+    }
+    for key, group in conn.execute(
+        "SELECT movie, group_name FROM movie_groups ORDER BY movie, position"
+    ):
+        movies[key]["groups"].append(group)
+
+    return movies
+
+
+def import_barcodes_ini(
+    conn: sqlite3.Connection,
+    iniFile: str="archives/barcodes.ini",
+    dataHeader: str="barcodes"
+):
+    """Loads barcodes.ini UPCs into the catalog.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      iniFile(str):
+        Barcode INI file. Defaults to "archives/barcodes.ini".
+      dataHeader(str):
+        Section header for barcode data in INI file.
+
+    Returns:
+      None
+    """
+    parser = ConfigParser()
+    parser.read(iniFile)
+    upcs = {}
+    for key in parser.options(dataHeader):
+        value = parser.get(dataHeader, key)
+        upcs[key] = None if value in ("", "None") else int(value)
+    update_barcodes(conn, upcs)
+
+
+def import_movies(
+    conn: sqlite3.Connection,
+    hostFile: str="archives/movies.yml",
+    batchSize: int=BATCH_SIZE,
+    prune: bool=False
+):
+    """Loads a Nornir host file into the catalog, replacing duplicates.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      hostFile(str):
+        Nornir host file. Defaults to "archives/movies.yml".
+      batchSize(int):
+        Number of movies written per transaction. Defaults to 500.
+      prune(bool):
+        Whether movies missing from hostFile are deleted, so that the
+        catalog matches it exactly. Defaults to False.
+
+    Returns:
+      List of the keys deleted via prune.
+    """
+    with open(hostFile) as f:
+        movies = yaml.safe_load(f) or {}
+    add_movies(conn, movies, overwrite=True, batchSize=batchSize)
+    if not prune:
+        return []
+
+    stale = [
+        key for (key,) in conn.execute("SELECT key FROM movies").fetchall()
+        if key not in movies
+    ]
+    with conn:
+        conn.executemany(
+            "DELETE FROM movies WHERE key = ?",
+            [(key,) for key in stale]
+        )
+
+    return stale
+
+
+def update_barcodes(conn: sqlite3.Connection, upcs: dict):
+    """Sets UPC values for the given movie keys.
+
+    SQL counterpart to the data.write_barcodes func; only the rows for
+    the supplied keys are touched.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      upcs(dict):
+        Movie key / UPC pairs.
+
+    Returns:
+      None
+    """
+    with conn:
+        conn.executemany(
+            "UPDATE release SET upc = ? WHERE movie = ?",
+            [(upc, key) for key, upc in upcs.items()]
+        )
+
+
+def update_groups(conn: sqlite3.Connection, movieGroups: dict):
+    """Replaces the groups of the given movies in place.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      movieGroups(dict):
+        Movie key to its new, complete list of groups.
+
+    Returns:
+      None
+    """
+    with conn:
+        conn.executemany(
+            "DELETE FROM movie_groups WHERE movie = ?",
+            [(key,) for key in movieGroups]
+        )
+        conn.executemany(
+            "INSERT INTO movie_groups (movie, position, group_name) "
+            "VALUES (?, ?, ?)",
+            [
+                (key, i, group)
+                for key, groups in movieGroups.items()
+                for i, group in enumerate(groups)
+            ]
+        )
+
+
+def update_sort_keys(conn: sqlite3.Connection, overrides: dict):
+    """Applies sortKey overrides in place.
+
+    SQL counterpart to utils.update_sort_keys. Matches are found via the
+    sort_key index and no resort is needed since catalog order is
+    derived from sort_key at read time.
+
+    Args:
+      conn(sqlite3.Connection):
+        Connection returned via the storage.connect func.
+      overrides(dict):
+        Override pairs returned via the data.import_sort_overrides func.
+
+    Returns:
+      Number of movies whose sort_key was updated.
+    """
+    with conn:
+        conn.execute(
+            "CREATE TEMP TABLE sort_overrides "
+            "(old TEXT PRIMARY KEY, new TEXT NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO sort_overrides (old, new) VALUES (?, ?)",
+            overrides.items()
+        )
+        # One statement, so chained overrides (A -> B, B -> C) map each
+        # movie from its original sort_key only.
+        cursor = conn.execute(
+            "UPDATE movies SET sort_key = (SELECT new FROM sort_overrides "
+            "WHERE old = movies.sort_key) "
+            "WHERE sort_key IN (SELECT old FROM sort_overrides)"
+        )
+        conn.execute("DROP TABLE sort_overrides")
+
+    return cursor.rowcount
+
+
+def _assemble(conn: sqlite3.Connection, where: str, args: list):
+    """Builds movie dicts for rows whose key matches the where clause."""
+    movieFilter = f"WHERE key {where}" if where else ""
+    childFilter = f"WHERE movie {where}" if where else ""
+    crew = {}
+    rows = conn.execute(
+        f"SELECT movie, role, name, is_list FROM crew {childFilter} "
+        "ORDER BY movie, role, position", args
+    )
+    for movie, role, name, isList in rows:
+        roles = crew.setdefault(movie, {})
+        if isList:
+            roles.setdefault(role, []).append(name)
+        else:
+            roles[role] = name
+    genres = _fetch_lists(conn, "genres", "genre", childFilter, args)
+    groups = _fetch_lists(conn, "movie_groups", "group_name", childFilter, args)
+    release = {}
+    rows = conn.execute(
+        "SELECT movie, publisher, upc, discs, aspect_ratio FROM release "
+        f"{childFilter}", args
+    )
+    for movie, publisher, upc, discs, aspectRatio in rows:
+        release[movie] = {
+            "publisher" : publisher,
+            "upc" : upc,
+            "discs" : discs,
+            "aspect_ratio" : aspectRatio,
+        }
+    mpaa = {}
+    rows = conn.execute(
+        "SELECT movie, certificate, rating, reason, distributor, alt_title "
+        f"FROM mpaa {childFilter}", args
+    )
+    for movie, cert, rating, reason, distributor, altTitle in rows:
+        mpaa[movie] = {
+            "certificate" : cert,
+            "rating" : rating,
+            "reason" : _decode(reason),
+            "distributor" : _decode(distributor),
+            "alt_title" : _decode(altTitle),
+        }
+
+    movies = {}
+    rows = conn.execute(
+        "SELECT key, title, year, runtime, sort_key, extra FROM movies "
+        f"{movieFilter} ORDER BY sort_key, key", args
+    )
+    for key, title, year, runtime, sortKey, extra in rows:
+        roles = crew.get(key, {})
+        data = {
+            "title" : title,
+            "year" : year,
+            "runtime" : runtime,
+            "director" : roles.get("director"),
+            "crew" : {r : roles[r] for r in CREW_ROLES if r in roles},
+            "release" : release.get(key),
+        }
+        if key in mpaa:
+            data["mpaa"] = mpaa[key]
+        data["genres"] = genres.get(key, [])
+        if extra is not None:
+            data.update(json.loads(extra))
+        movies[key] = {
+            "groups" : groups.get(key, []),
+            "data" : data,
+            "sort_key" : sortKey,
+        }
+
+    return movies
+
+
+def _decode(value: str):
+    """Decodes a JSON encoded MPAA column, preserving NULL as None."""
+    return None if value is None else json.loads(value)
+
+
+def _encode(value):
+    """JSON encodes an MPAA value so str vs list survives a round trip."""
+    return None if value is None else json.dumps(value)
+
+
+def _fetch_lists(
+    conn: sqlite3.Connection,
+    table: str,
+    column: str,
+    where: str,
+    args: list
+):
+    """Collects an ordered child list per movie from table."""
+    lists = {}
+    rows = conn.execute(
+        f"SELECT movie, {column} FROM {table} {where} "
+        "ORDER BY movie, position", args
+    )
+    for movie, value in rows:
+        lists.setdefault(movie, []).append(value)
+
+    return lists
+
+
+def _insert_movies(conn: sqlite3.Connection, movies: dict):
+    """Flattens movie dicts into rows and inserts them via executemany."""
+    movieRows = []
+    releaseRows = []
+    mpaaRows = []
+    genreRows = []
+    groupRows = []
+    crewRows = []
+    for key, mv in movies.items():
+        data = mv["data"]
+        extra = {k : v for k, v in data.items() if k not in DATA_KEYS}
+        movieRows.append((
+            key,
+            data["title"],
+            data.get("year"),
+            data.get("runtime"),
+            mv["sort_key"],
+            json.dumps(extra) if extra else None,
+        ))
+        release = data.get("release") or {}
+        releaseRows.append((
+            key,
+            release.get("publisher"),
+            release.get("upc"),
+            release.get("discs"),
+            release.get("aspect_ratio"),
+        ))
+        if "mpaa" in data:
+            mpaa = data["mpaa"]
+            mpaaRows.append((
+                key,
+                mpaa.get("certificate"),
+                mpaa.get("rating"),
+                *(_encode(mpaa.get(field)) for field in MPAA_LISTS),
+            ))
+        for i, genre in enumerate(data.get("genres") or []):
+            genreRows.append((key, i, genre))
+        for i, group in enumerate(mv.get("groups") or []):
+            groupRows.append((key, i, group))
+        roles = {"director" : data.get("director"), **(data.get("crew") or {})}
+        for role, names in roles.items():
+            if isinstance(names, list):
+                for i, name in enumerate(names):
+                    crewRows.append((key, role, i, name, 1))
+            else:
+                crewRows.append((key, role, 0, names, 0))
+
+    conn.executemany(
+        "INSERT INTO movies (key, title, year, runtime, sort_key, extra) "
+        "VALUES (?, ?, ?, ?, ?, ?)", movieRows
+    )
+    conn.executemany(
+        "INSERT INTO release (movie, publisher, upc, discs, aspect_ratio) "
+        "VALUES (?, ?, ?, ?, ?)", releaseRows
+    )
+    conn.executemany(
+        "INSERT INTO mpaa (movie, certificate, rating, reason, distributor, "
+        "alt_title) VALUES (?, ?, ?, ?, ?, ?)", mpaaRows
+    )
+    conn.executemany(
+        "INSERT INTO genres (movie, position, genre) VALUES (?, ?, ?)",
+        genreRows
+    )
+    conn.executemany(
+        "INSERT INTO movie_groups (movie, position, group_name) "
+        "VALUES (?, ?, ?)", groupRows
+    )
+    conn.executemany(
+        "INSERT INTO crew (movie, role, position, name, is_list) "
+        "VALUES (?, ?, ?, ?, ?)", crewRows
+    )
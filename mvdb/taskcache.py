@@ -0,0 +1,368 @@
+import copy
+import hashlib
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Result, Task
+
+
+TASK_CACHE = "archives/taskcache.db"
+BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    task TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+
+class TaskCache:
+    """Persistent, content-addressed cache of Nornir task results.
+
+    Entries are keyed by the task's identity (its qualified name, a hash
+    of its code and its arguments) plus a hash of the host's name,
+    parent groups and resolved data, including data inherited from
+    groups and defaults, taken before the task runs. Editing a movie,
+    its groups or the task itself therefore misses the cache; anything
+    else is a hit.
+
+    Besides the task's results, each entry records the changes the task
+    made to host.data (e.g. the "marquee" set via package_marquee), so
+    a hit reproduces them. Since the key covers every value the task
+    could have read, including its own earlier output, a task which
+    reads what it writes is never served a stale result.
+
+    The cache lives in a SQLite file and is bounded by maxBytes; the
+    least recently used entries are evicted first.
+    """
+
+    def __init__(self, path: str=TASK_CACHE, maxBytes: int=64 * 2**20):
+        """Opens (or creates) the cache.
+
+        Args:
+          path(str):
+            The SQLite cache file. Defaults to TASK_CACHE.
+          maxBytes(int):
+            Upper bound on the size of the cached values. Defaults to
+            64MiB.
+        """
+        self.path = path
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def stats(self):
+        """Returns the hit & miss counts since the cache was opened.
+
+        Returns:
+          Dict with "hits", "misses", "entries" and "bytes" values.
+        """
+        with self._lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+
+        return {
+            "hits" : self.hits,
+            "misses" : self.misses,
+            "entries" : entries,
+            "bytes" : size,
+        }
+
+    def clear(self):
+        """Drops every entry and resets the hit & miss counts."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM entries")
+        self.hits = 0
+        self.misses = 0
+
+    def task_id(self, task: Task):
+        """Identifies a task by its name, code and arguments.
+
+        Args:
+          task(Task):
+            The Nornir Task object being run.
+
+        Returns:
+          The task identity as a string.
+        """
+        func = task.task
+        code = getattr(func, "__code__", None)
+        digest = hashlib.sha256(_code_bytes(code) if code else b"")
+        digest.update(_canonical(task.params).encode())
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        return f"{name}:{digest.hexdigest()[:32]}"
+
+    def host_key(self, taskId: str, host: Host):
+        """Content address of a task's result for a host.
+
+        Args:
+          taskId(str):
+            Task identity returned via the task_id method.
+          host(Host):
+            Nornir host representing a single movie, before the task
+            runs against it.
+
+        Returns:
+          The hex digest used as the entry key.
+        """
+        return _content_key(taskId, host)
+
+    def get(self, key: str):
+        """Fetches an entry, marking it as recently used.
+
+        Returns:
+          The entry dict stored via the put method, or None.
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: list):
+        """Fetches many entries at once, marking them as recently used.
+
+        Args:
+          keys(list):
+            Entry keys returned via the host_key method.
+
+        Returns:
+          Dict of key to entry dict for the keys which were cached.
+        """
+        found = {}
+        with self._lock, self.conn:
+            for i in range(0, len(keys), BATCH_SIZE):
+                batch = keys[i:i + BATCH_SIZE]
+                found.update(self.conn.execute(
+                    "SELECT key, value FROM entries WHERE key IN "
+                    f"({', '.join('?' * len(batch))})",
+                    batch
+                ))
+            now = time.time_ns()
+            self.conn.executemany(
+                "UPDATE entries SET used = ? WHERE key = ?",
+                ((now, key) for key in found)
+            )
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return {key : pickle.loads(value) for key, value in found.items()}
+
+    def put(self, entries: dict, taskId: str):
+        """Stores entries and evicts down to maxBytes.
+
+        Args:
+          entries(dict):
+            Entry key to entry dict (see CachingRunner).
+          taskId(str):
+            Task identity returned via the task_id method.
+
+        Returns:
+          None
+        """
+        now = time.time_ns()
+        rows = []
+        for key, entry in entries.items():
+            try:
+                blob = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                logger.warning("Result for %s can't be cached.", taskId)
+                continue
+            rows.append((key, taskId, blob, len(blob), now))
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries "
+                "(key, task, value, size, used) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+
+    def _evict(self):
+        """Deletes least recently used entries beyond maxBytes."""
+        total = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.maxBytes:
+            return
+
+        stale = []
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM entries ORDER BY used"
+        ):
+            if total <= self.maxBytes:
+                break
+            stale.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+
+class CachingRunner:
+    """Nornir runner which serves unchanged hosts from a TaskCache.
+
+    Wraps another runner (e.g. the threaded runner from config.yml):
+    hosts whose entry is cached get their results and host.data changes
+    replayed, and only the remaining hosts are passed to the wrapped
+    runner. Failed results are never cached.
+
+    Since Nornir.filter keeps the runner, filtered Nornir objects share
+    the cache as well.
+
+    Every task is cached unless it is listed in bypass, in which case
+    it is passed straight to the wrapped runner. Whether a task is
+    cached therefore never depends on timings or machine load.
+    """
+
+    def __init__(self, runner, cache: TaskCache, bypass: tuple=()):
+        """Wraps runner with cache.
+
+        Args:
+          runner:
+            The Nornir runner plugin to wrap, e.g. MvDB.nr.runner.
+          cache(TaskCache):
+            The cache to read from & write to.
+          bypass(tuple):
+            Task functions which are never cached, e.g. tasks with
+            side effects beyond host.data. Defaults to ().
+        """
+        self.runner = runner
+        self.cache = cache
+        self.bypass = set(bypass)
+        self.last = {"hits" : 0, "misses" : 0, "bypassed" : 0}
+
+    def run(self, task: Task, hosts: list):
+        if task.task in self.bypass:
+            self.last = {"hits" : 0, "misses" : 0, "bypassed" : len(hosts)}
+            return self.runner.run(task, hosts)
+
+        taskId = self.cache.task_id(task)
+        keys = {host.name : _content_key(taskId, host) for host in hosts}
+        found = self.cache.get_many(list(dict.fromkeys(keys.values())))
+        cached = {}
+        pending = []
+        snapshots = {}
+        for host in hosts:
+            entry = found.get(keys[host.name])
+            if entry is None:
+                pending.append(host)
+                # Deep copy, as tasks may mutate nested values in place.
+                snapshots[host.name] = copy.deepcopy(host.data)
+            else:
+                cached[host.name] = _replay(entry, host, task.name)
+        self.last = {
+            "hits" : len(cached),
+            "misses" : len(pending),
+            "bypassed" : 0,
+        }
+        logger.info(
+            "Task %r: %d cached, %d executed",
+            task.name,
+            len(cached),
+            len(pending)
+        )
+
+        executed = {}
+        if pending:
+            executed = self.runner.run(task, pending)
+        entries = {}
+        for host in pending:
+            multiResult = executed[host.name]
+            if multiResult.failed:
+                continue
+            before = snapshots[host.name]
+            written = {
+                k : v for k, v in host.data.items()
+                if k not in before or before[k] != v
+            }
+            # Keyed on the data the task ran against.
+            entries[keys[host.name]] = {
+                "results" : [
+                    {
+                        "name" : r.name,
+                        "result" : r.result,
+                        "changed" : r.changed,
+                        "diff" : r.diff,
+                    }
+                    for r in multiResult
+                ],
+                "set" : written,
+                "delete" : [k for k in before if k not in host.data],
+            }
+        if entries:
+            self.cache.put(entries, taskId)
+
+        result = AggregatedResult(task.name)
+        for host in hosts:
+            if host.name in cached:
+                result[host.name] = cached[host.name]
+            else:
+                result[host.name] = executed[host.name]
+
+        return result
+
+
+def _apply(entry: dict, host: Host):
+    """Applies an entry's recorded host.data changes to host."""
+    host.data.update(entry["set"])
+    for key in entry["delete"]:
+        host.data.pop(key, None)
+
+
+def _canonical(value):
+    """Serializes value to a stable JSON string for hashing."""
+    return json.dumps(value, sort_keys=True, default=repr)
+
+
+def _code_bytes(code):
+    """Bytecode & constants of a code object, including nested ones."""
+    blob = code.co_code + repr(code.co_names).encode()
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            blob += _code_bytes(const)
+        else:
+            blob += repr(const).encode()
+
+    return blob
+
+
+def _content_key(taskId: str, host: Host):
+    """Hashes a task identity with a host's name, groups & data."""
+    blob = _canonical({
+        "task" : taskId,
+        "name" : host.name,
+        "groups" : [group.name for group in host.extended_groups()],
+        "data" : host.extended_data(),
+    })
+
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _replay(entry: dict, host: Host, name: str):
+    """Rebuilds a cached MultiResult and reapplies its data changes."""
+    _apply(entry, host)
+    multiResult = MultiResult(name)
+    for r in entry["results"]:
+        multiResult.append(Result(
+            host=host,
+            result=r["result"],
+            changed=r["changed"],
+            diff=r["diff"],
+            name=r["name"],
+        ))
+
+    return multiResult
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import mvdb.diff
+
+
+OG = """---
+heat:
+  data:
+    title: Heat
+    year: 1995
+
+ran:
+  data:
+    title: Ran
+    year: 1985
+
+thief:
+  data:
+    title: Thief
+    year: 1981
+"""
+# ran is only reformatted, thief is edited, heat is removed and zodiac
+# is added.
+RC = """---
+ran:
+  data:
+    title: 'Ran'
+    year: 1985
+
+thief:
+  data:
+    title: Thief
+    year: 1982
+
+zodiac:
+  data:
+    title: Zodiac
+    year: 2007
+"""
+
+
+class DiffCatalogsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.ogFile = self.write("movies.yml", OG)
+        self.rcFile = self.write("movies.yml.rc", RC)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmpDir.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+
+        return path
+
+    def test_counts(self):
+        report = mvdb.diff.diff_files(self.ogFile, self.rcFile)
+        self.assertEqual(report["added"], ["zodiac"])
+        self.assertEqual(report["removed"], ["heat"])
+        self.assertEqual(report["changed"], {
+            "thief" : [{"path" : "data.year", "old" : 1981, "new" : 1982}],
+        })
+        self.assertEqual(report["unchanged"], 1)
+
+    def test_identical_files(self):
+        report = mvdb.diff.diff_files(self.ogFile, self.ogFile)
+        self.assertEqual(report["changed"], {})
+        self.assertEqual(report["unchanged"], 3)
+
+    def test_barcodes(self):
+        og = self.write("barcodes.ini", "[barcodes]\nheat = 1\nran = 2\n")
+        rc = self.write("barcodes.ini.rc", "[barcodes]\nheat = 1\nran = 3\n")
+        report = mvdb.diff.diff_files(og, rc)
+        self.assertEqual(list(report["changed"]), ["ran"])
+        self.assertEqual(report["unchanged"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
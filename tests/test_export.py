@@ -0,0 +1,80 @@
+from configparser import ConfigParser
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from mvdb.data import import_current_genres, import_movies_csv
+from mvdb.plugins.inventory import build_inventory
+import mvdb.export
+
+
+def strip_nulls(value):
+    """Drops None values, which the CSV importer fills in for crew."""
+    if isinstance(value, dict):
+        return {k : strip_nulls(v) for k, v in value.items() if v is not None}
+
+    return value
+
+
+class ExportTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open("archives/movies.yml") as f:
+            cls.movies = dict(list(yaml.safe_load(f).items())[:20])
+        with open("archives/groups.yml") as f:
+            cls.groups = yaml.safe_load(f)
+        with open("archives/defaults.yml") as f:
+            cls.defaults = yaml.safe_load(f)
+        parser = ConfigParser()
+        parser.read("archives/tech_specs.ini")
+        cls.genres = import_current_genres(parser, "summary")
+
+    def setUp(self):
+        self.inventory = build_inventory(
+            self.movies,
+            self.groups,
+            self.defaults
+        )
+
+    def test_csv_round_trips_through_import(self):
+        with tempfile.TemporaryDirectory() as tmpDir:
+            csvFile = os.path.join(tmpDir, "movies.csv")
+            with open(csvFile, "w", newline="") as f:
+                rows = mvdb.export.write_csv(
+                    self.inventory.hosts,
+                    f,
+                    self.genres,
+                    self.inventory.groups,
+                    self.inventory.defaults
+                )
+            with contextlib.redirect_stdout(io.StringIO()):
+                imported = import_movies_csv(csvFile)
+        self.assertEqual(rows, len(self.movies))
+        self.assertEqual(list(imported), list(self.movies))
+        for key, movie in self.movies.items():
+            self.assertEqual(strip_nulls(imported[key]), strip_nulls(movie))
+
+    def test_jsonl_holds_resolved_data(self):
+        stream = io.StringIO()
+        rows = mvdb.export.write_jsonl(self.inventory.hosts, stream)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(rows, len(self.movies))
+        self.assertEqual([line["name"] for line in lines], list(self.movies))
+        for line in lines:
+            host = self.inventory.hosts[line["name"]]
+            self.assertEqual(line["data"]["format"], host["format"])
+            self.assertEqual(line["data"]["color"], host["color"])
+            self.assertEqual(
+                line["groups"],
+                self.movies[line["name"]].get("groups") or []
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
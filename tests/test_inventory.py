@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from nornir.core.filter import F
+
+from mvdb.framework import MvDB
+from mvdb.journal import Journal
+from mvdb.plugins.inventory import _UNBUILT, build_inventory
+
+
+HOSTS = {
+    "heat" : {"groups" : ["4k_uhd"], "data" : {"title" : "Heat"}},
+    "ran" : {"groups" : ["blu-ray"], "data" : {"title" : "Ran"}},
+    "thief" : {"groups" : ["hdr10_dv"], "data" : {"title" : "Thief"}},
+}
+GROUPS = {
+    "4k_uhd" : {"data" : {"format" : "4K"}},
+    "blu-ray" : {"data" : {"format" : "Blu-ray"}},
+    "hdr10_dv" : {"groups" : ["4k_uhd"], "data" : {"hdr" : "DV"}},
+}
+
+
+class LazyHostsTest(unittest.TestCase):
+
+    def test_parent_group_hosts_matches_filter_unbuilt(self):
+        inventory = build_inventory(HOSTS, GROUPS, {})
+        hosts = inventory.hosts.parent_group_hosts("4k_uhd")
+        self.assertTrue(all(h is _UNBUILT for h in dict.values(hosts)))
+        expected = build_inventory(HOSTS, GROUPS, {}).filter(
+            F(has_parent_group="4k_uhd")
+        ).hosts
+        self.assertEqual(sorted(hosts), sorted(expected))
+
+    def test_parent_group_hosts_share_hosts(self):
+        inventory = build_inventory(HOSTS, GROUPS, {})
+        hosts = inventory.hosts.parent_group_hosts("4k_uhd")
+        self.assertIs(hosts["thief"], inventory.hosts["thief"])
+        self.assertEqual(hosts["thief"]["format"], "4K")
+
+    def test_pop_drops_unbuilt_filter_host(self):
+        inventory = build_inventory(HOSTS, GROUPS, {})
+        hosts = inventory.hosts.parent_group_hosts("4k_uhd")
+        inventory.hosts.pop("thief")
+        self.assertIsNone(hosts.pop("thief", None))
+        self.assertNotIn("thief", hosts)
+
+
+CONFIG = """---
+inventory:
+  plugin: MvDBInventory
+  options:
+    catalog_file: "{catalogFile}"
+    host_file: "archives/movies.yml"
+    group_file: "archives/groups.yml"
+    defaults_file: "archives/defaults.yml"
+logging:
+  enabled: false
+runner:
+  plugin: serial
+"""
+
+
+class LazyMvDBTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.cfgFile = os.path.join(self.tmpDir.name, "config.yml")
+        self.journalFile = os.path.join(self.tmpDir.name, "movies.journal")
+        catalogFile = os.path.join(self.tmpDir.name, "movies.catalog")
+        with open(self.cfgFile, "w") as f:
+            f.write(CONFIG.format(catalogFile=catalogFile))
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def test_journaled_delete_replays_on_lazy_catalog(self):
+        with Journal(self.journalFile) as j:
+            j.delete("2001-a_space_odyssey")
+        db = MvDB(cfgFile=self.cfgFile, journalFile=self.journalFile)
+        self.assertNotIn("2001-a_space_odyssey", db.movies)
+        self.assertNotIn("2001-a_space_odyssey", db.uhd.inventory.hosts)
+        self.assertNotIn("2001-a_space_odyssey", db.dv.inventory.hosts)
+
+
+if __name__ == "__main__":
+    unittest.main()
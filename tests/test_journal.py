@@ -0,0 +1,120 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from mvdb.journal import Journal, compact, read_journal, replay
+import mvdb.storage
+from utils.add_movies import existing_keys, merge_imports
+
+
+HOSTS = """---
+heat:
+  data:
+    title: Heat
+ran:
+  data:
+    title: Ran
+"""
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.hostFile = os.path.join(self.tmpDir.name, "movies.yml")
+        self.journalFile = os.path.join(self.tmpDir.name, "movies.journal")
+        self.db = os.path.join(self.tmpDir.name, "movies.db")
+        with open(self.hostFile, "w") as f:
+            f.write(HOSTS)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def existing(self, keys):
+        return existing_keys(keys, self.hostFile, self.db, self.journalFile)
+
+    def test_replay_is_idempotent(self):
+        with Journal(self.journalFile) as j:
+            j.add("thief", {"data" : {"title" : "Thief"}})
+            j.delete("ran")
+        records = read_journal(self.journalFile)
+        movies = {"heat" : {}, "ran" : {}}
+        replay(movies, records)
+        self.assertEqual(replay(dict(movies), records), movies)
+        self.assertEqual(list(movies), ["heat", "thief"])
+
+    def test_torn_tail_is_dropped(self):
+        with Journal(self.journalFile) as j:
+            j.add("thief", {"data" : {"title" : "Thief"}})
+        with open(self.journalFile, "ab") as f:
+            f.write(b"0000 {\"op\":")
+        self.assertEqual(len(read_journal(self.journalFile)), 1)
+
+    def test_existing_keys_include_journal(self):
+        self.assertEqual(self.existing(["heat", "thief"]), {"heat"})
+        with Journal(self.journalFile) as j:
+            j.add("thief", {"data" : {"title" : "Thief"}})
+            j.delete("heat")
+        self.assertEqual(
+            self.existing(["heat", "ran", "thief", "zodiac"]),
+            {"ran", "thief"}
+        )
+
+    def test_merge_imports_lists_duplicates_once(self):
+        thief = {"data" : {"title" : "Thief"}}
+        summary = {
+            key : [] for key in
+            ("added", "overwritten", "skipped", "duplicates")
+        }
+        summary.update({"files" : {}, "errors" : {}, "written" : False})
+        with Journal(self.journalFile) as j:
+            summary, status = merge_imports(
+                ["a.csv", "b.csv", "c.csv"],
+                [({"thief" : thief}, None)] * 2
+                + [({"thief" : thief, "heat" : {}}, None)],
+                {"heat"},
+                "skip",
+                summary,
+                j
+            )
+        self.assertEqual(status, 0)
+        self.assertEqual(summary["duplicates"], ["thief", "heat"])
+        self.assertEqual(summary["skipped"], ["thief", "heat"])
+        self.assertEqual(summary["added"], ["thief"])
+
+    def test_compact_updates_db(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        with open("archives/movies.yml") as f:
+            movies = dict(list(yaml.safe_load(f).items())[:3])
+        first, second, third = movies
+        with open(self.hostFile, "w") as f:
+            yaml.safe_dump({k : movies[k] for k in (first, second)}, f)
+        conn = mvdb.storage.connect(self.db)
+        mvdb.storage.import_movies(conn, self.hostFile)
+        conn.close()
+
+        with Journal(self.journalFile) as j:
+            j.add(third, movies[third])
+            j.delete(first)
+        barcodes = os.path.join(self.tmpDir.name, "barcodes.ini")
+        self.assertEqual(
+            compact(self.journalFile, self.hostFile, barcodes, self.db), 2
+        )
+
+        conn = mvdb.storage.connect(self.db)
+        keys = [k for (k,) in conn.execute("SELECT key FROM movies")]
+        conn.close()
+        with open(self.hostFile) as f:
+            hosts = yaml.safe_load(f)
+        self.assertEqual(sorted(keys), sorted([second, third]))
+        self.assertEqual(sorted(hosts), sorted(keys))
+        self.assertEqual(read_journal(self.journalFile), [])
+        self.assertEqual(self.existing([first, third]), {third})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from mvdb.data import dump_movies_yaml
+from mvdb.exceptions import MovieNotFoundError
+import mvdb.offsets
+
+
+class OffsetsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open("archives/movies.yml") as f:
+            cls.movies = yaml.safe_load(f)
+        cls.catalog = dump_movies_yaml(cls.movies)
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.hostFile = os.path.join(self.tmpDir.name, "movies.yml")
+        with open(self.hostFile, "w") as f:
+            f.write(self.catalog)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def test_index_matches_parsed_catalog(self):
+        index = mvdb.offsets.load_offset_index(self.hostFile)
+        self.assertEqual(list(index), list(self.movies))
+        for key, (_, _, sortKey, upc) in index.items():
+            self.assertEqual(sortKey, self.movies[key]["sort_key"])
+            self.assertEqual(upc, self.movies[key]["data"]["release"]["upc"])
+        self.assertEqual(
+            sorted(os.listdir(self.tmpDir.name)),
+            ["movies.yml", "movies.yml.idx"]
+        )
+
+    def test_parse_scalar_falls_back_to_yaml(self):
+        for value in ("heat", "1.5", "1_000", "'on'", "yes", "null", "12"):
+            line = f"  sort_key: {value}\n".encode()
+            expected = yaml.safe_load(line.decode())["sort_key"]
+            parsed = mvdb.offsets._parse_scalar(line, "sort_key")
+            self.assertEqual(parsed, expected)
+            self.assertIs(type(parsed), type(expected))
+
+    def test_load_movies_names_missing_keys(self):
+        keys = list(self.movies)[5:8]
+        movies = mvdb.offsets.load_movies(keys, self.hostFile)
+        self.assertEqual(movies, {key : self.movies[key] for key in keys})
+        with self.assertRaises(MovieNotFoundError) as cm:
+            mvdb.offsets.load_movies(keys + ["nope"], self.hostFile)
+        self.assertIn("nope", str(cm.exception))
+
+    def test_splice_matches_full_dump(self):
+        first, second = list(self.movies)[:2]
+        edits = {
+            first : dict(self.movies[first], sort_key="zzz"),
+            "new" : dict(self.movies[second], sort_key="aaa"),
+        }
+        movies = dict(self.movies, **edits)
+        movies = dict(sorted(movies.items(), key=lambda m: m[1]["sort_key"]))
+        self.assertEqual(
+            mvdb.offsets.splice_movies(edits, self.hostFile),
+            dump_movies_yaml(movies)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import mvdb.profiling
+
+
+def busy(n: int):
+    return sum(i * i for i in range(n))
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.outDir = os.path.join(self.tmpDir.name, "profile")
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def test_stage_is_noop_without_profile(self):
+        with mvdb.profiling.stage("transform"):
+            busy(10)
+        self.assertFalse(os.path.exists(self.outDir))
+
+    def test_profile_writes_each_stage(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            with mvdb.profiling.profile(self.outDir) as profiler:
+                with mvdb.profiling.stage("csv_read"):
+                    busy(10000)
+                    with mvdb.profiling.stage("nested"):
+                        busy(10000)
+                with mvdb.profiling.stage("yaml_dump"):
+                    busy(10000)
+        self.assertEqual(
+            [stage["name"] for stage in profiler.stages],
+            ["csv_read", "yaml_dump"]
+        )
+        files = set(os.listdir(self.outDir))
+        for prefix in ("01-csv_read", "02-yaml_dump"):
+            for suffix in (".pstats", ".collapsed", ".alloc.txt"):
+                self.assertIn(prefix + suffix, files)
+        self.assertIn("all.collapsed", files)
+        with open(os.path.join(self.outDir, "summary.txt")) as f:
+            summary = f.read()
+        self.assertEqual(
+            [line.split()[0] for line in summary.splitlines()],
+            ["stage", "csv_read", "yaml_dump", "total"]
+        )
+        self.assertIn(summary.strip(), stderr.getvalue())
+
+    def test_collapsed_stacks_name_profiled_funcs(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with mvdb.profiling.profile(self.outDir) as profiler:
+                with mvdb.profiling.stage("transform"):
+                    busy(50000)
+        stacks = mvdb.profiling.collapse_stats(profiler.stages[0]["stats"])
+        self.assertTrue(any("test_profiling:busy:" in s for s in stacks))
+        self.assertTrue(all(micros >= 1 for micros in stacks.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import threading
+import unittest
+
+from mvdb.registry import CatalogRegistry
+
+
+class SlowRegistry(CatalogRegistry):
+    """Registry whose "slow" catalog blocks in _load until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.loading = threading.Event()
+        self.release = threading.Event()
+        self.loads = 0
+
+    def _load(self, entry: dict):
+        self.loads += 1
+        if entry["hostFile"] == "slow":
+            self.loading.set()
+            self.release.wait(5)
+
+        return object()
+
+
+class RegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = SlowRegistry()
+        self.registry.register("fast", "fast")
+        self.registry.register("slow", "slow")
+
+    def test_cold_load_does_not_block_loaded_catalogs(self):
+        fast = self.registry.get("fast")
+        worker = threading.Thread(target=self.registry.get, args=("slow",))
+        worker.start()
+        self.assertTrue(self.registry.loading.wait(5))
+
+        results = []
+        reader = threading.Thread(
+            target=lambda: results.append(self.registry.get("fast"))
+        )
+        reader.start()
+        reader.join(1)
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(results, [fast])
+
+        self.registry.release.set()
+        worker.join(5)
+        self.assertIn("slow", self.registry.loaded)
+
+    def test_concurrent_gets_load_once(self):
+        results = []
+        workers = [
+            threading.Thread(
+                target=lambda: results.append(self.registry.get("slow"))
+            )
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        self.assertTrue(self.registry.loading.wait(5))
+        self.registry.release.set()
+        for worker in workers:
+            worker.join(5)
+
+        self.assertEqual(self.registry.loads, 1)
+        self.assertEqual(len(set(map(id, results))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
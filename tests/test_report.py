@@ -0,0 +1,89 @@
+import csv
+import io
+import unittest
+
+from mvdb.plugins.inventory import build_inventory
+import mvdb.report
+
+
+def movie(title: str, year, publisher, groups: list):
+    return {
+        "groups" : groups,
+        "data" : {
+            "title" : title,
+            "year" : year,
+            "runtime" : 100,
+            "director" : ["Lana Wachowski", "Lilly Wachowski"],
+            "release" : {
+                "publisher" : publisher,
+                "aspect_ratio" : 2.39,
+                "discs" : 1,
+            },
+            "steelbook" : title == "Heat",
+        },
+    }
+
+
+HOSTS = {
+    "heat" : movie("Heat", 1995, "Fox", ["4k_uhd"]),
+    "matrix" : movie("The Matrix | Reloaded", 2003, None, ["4k_uhd"]),
+    "ran" : movie("Ran", None, "Criterion", ["blu-ray"]),
+    "thief" : movie("Thief", 1981, "Criterion", ["blu-ray"]),
+}
+GROUPS = {
+    "4k_uhd" : {"data" : {"format" : "4K UHD", "resolution" : 2160}},
+    "blu-ray" : {"data" : {"format" : "Blu-Ray", "resolution" : 1080}},
+}
+DEFAULTS = {
+    "data" : {
+        "color" : True,
+        "animation" : False,
+        "slipcover" : False,
+        "steelbook" : False,
+        "boutique_release" : False,
+    },
+}
+
+
+class ReportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.hosts = build_inventory(HOSTS, GROUPS, DEFAULTS).hosts
+
+    def report(self, **kwargs):
+        stream = io.StringIO()
+        rows = mvdb.report.write_report(self.hosts, stream, **kwargs)
+
+        return rows, stream.getvalue()
+
+    def test_missing_values_group_as_unknown_last(self):
+        for groupBy, expected in (
+            ("decade", ["1980s", "1990s", "2000s", "Unknown"]),
+            ("publisher", ["Criterion", "Fox", "Unknown"]),
+        ):
+            rows, text = self.report(fmt="csv", groupBy=groupBy)
+            groups = [row[0] for row in csv.reader(io.StringIO(text))][1:]
+            self.assertEqual(rows, 4)
+            self.assertEqual(list(dict.fromkeys(groups)), expected)
+
+    def test_every_format_writes_every_row(self):
+        for fmt in mvdb.report.WRITERS:
+            rows, text = self.report(fmt=fmt, groupBy="format")
+            self.assertEqual(rows, 4)
+            self.assertIn("Thief", text)
+            if fmt != "csv":
+                self.assertIn("Total number of titles: 4", text)
+
+    def test_markdown_escapes_cells_and_legend(self):
+        _, text = self.report(fmt="md")
+        self.assertIn("The Matrix \\| Reloaded", text)
+        self.assertIn("- \\* Steelbook®", text)
+
+    def test_page_keeps_full_total(self):
+        rows, text = self.report(page=2, pageSize=3)
+        self.assertEqual(rows, 1)
+        self.assertIn("Total number of titles: 4", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
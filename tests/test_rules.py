@@ -0,0 +1,62 @@
+from configparser import ConfigParser
+import unittest
+
+import yaml
+
+from mvdb.data import import_boutiques
+import mvdb.rules
+
+
+class RulesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open("archives/movies.yml") as f:
+            cls.movies = yaml.safe_load(f)
+
+    def setUp(self):
+        self.parser = ConfigParser()
+        self.parser.read("archives/tech_specs.ini")
+
+    def publisher(self, key: str):
+        return self.movies[key]["data"]["release"]["publisher"]
+
+    def test_catalog_matches_rules(self):
+        changes = mvdb.rules.derive_groups(self.movies, self.parser)
+        self.assertEqual(changes, {})
+
+    def test_label_change_matches_full_rescan(self):
+        labels = import_boutiques(self.parser, "boutiqueLabels")
+        labels.remove("The Criterion Collection")
+        labels.append("Universal Studios")
+        self.parser.set("boutiqueLabels", "labels", ",".join(labels))
+
+        changes = mvdb.rules.derive_groups(self.movies, self.parser)
+        expected = {}
+        for key, movie in self.movies.items():
+            isBoutique = "boutique" in (movie.get("groups") or [])
+            if self.publisher(key) in labels and not isBoutique:
+                expected[key] = {"add" : ["boutique"], "remove" : []}
+            elif self.publisher(key) not in labels and isBoutique:
+                expected[key] = {"add" : [], "remove" : ["boutique"]}
+        self.assertEqual(changes, expected)
+        self.assertTrue(any(c["add"] for c in changes.values()))
+        self.assertTrue(any(c["remove"] for c in changes.values()))
+
+    def test_added_groups_keep_import_order(self):
+        change = {"add" : ["boutique"], "remove" : ["slipcover"]}
+        self.assertEqual(
+            mvdb.rules.apply_group_changes(
+                ["4k_uhd", "animation", "steelbook", "slipcover"],
+                change
+            ),
+            ["4k_uhd", "animation", "boutique", "steelbook"]
+        )
+        self.assertEqual(
+            mvdb.rules.apply_group_changes(None, change),
+            ["boutique"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
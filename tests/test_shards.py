@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+import yaml
+
+import mvdb.catalog
+import mvdb.shards
+
+
+def movie(sortKey: str):
+    return {"data" : {"title" : sortKey}, "sort_key" : sortKey}
+
+
+class ShardsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def round_trip(self, movies: dict, **kwargs):
+        mvdb.shards.export_movies_shards(
+            mvdb.shards.dump_movies_shards(movies, **kwargs),
+            self.tmpDir.name
+        )
+
+        return mvdb.shards.load_movies_shards(self.tmpDir.name, workers=1)
+
+    def test_punctuation_prefixes_get_distinct_shards(self):
+        # "/" and ":" sort on either side of "0".
+        movies = {
+            "slash" : movie("/slash"),
+            "zero" : movie("0zero"),
+            "colon" : movie(":colon"),
+        }
+        shards = mvdb.shards.dump_movies_shards(movies)
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(list(self.round_trip(movies)), list(movies))
+
+    def test_load_keeps_catalog_order(self):
+        movies = {
+            key : movie(key)
+            for key in ("alien", "Blade", "brazil", "casablanca", "heat")
+        }
+        movies = dict(sorted(movies.items(), key=lambda m: m[1]["sort_key"]))
+        for kwargs in ({}, {"by" : "size", "shardSize" : 2}):
+            self.assertEqual(
+                list(self.round_trip(movies, **kwargs)),
+                list(movies)
+            )
+
+    def test_stale_shards_are_rebuilt(self):
+        hostFile = os.path.join(self.tmpDir.name, "movies.yml")
+        shardDir = os.path.join(self.tmpDir.name, "movies.d")
+        movies = {key : movie(key) for key in ("alien", "brazil")}
+        with open(hostFile, "w") as f:
+            yaml.safe_dump(movies, f)
+        mvdb.catalog.build_sharded_catalog(shardDir, hostFile, by="size")
+
+        movies["casablanca"] = movie("casablanca")
+        with open(hostFile, "w") as f:
+            yaml.safe_dump(movies, f)
+        trusted = mvdb.catalog.load_sharded_catalog(
+            shardDir,
+            workers=1,
+            hostFile=hostFile,
+            rebuild=False
+        )
+        self.assertEqual(list(trusted["hosts"]), ["alien", "brazil"])
+
+        rebuilt = mvdb.catalog.load_sharded_catalog(
+            shardDir,
+            workers=1,
+            hostFile=hostFile
+        )
+        self.assertEqual(list(rebuilt["hosts"]), list(movies))
+        self.assertEqual(
+            mvdb.shards.read_manifest(shardDir)["metadata"]["layout"]["by"],
+            "size"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
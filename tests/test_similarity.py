@@ -0,0 +1,64 @@
+from configparser import ConfigParser
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from mvdb import similarity
+from mvdb.similarity import SimilarityIndex, load_neighbors, save_neighbors
+
+
+class SimilarityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open("archives/movies.yml") as f:
+            cls.movies = yaml.safe_load(f)
+        cls.parser = ConfigParser()
+        cls.parser.read("archives/tech_specs.ini")
+        cls.index = SimilarityIndex(cls.movies, cls.parser, useNumpy=False)
+
+    def bits(self, key: str):
+        vector = self.index.vectors[self.index.rows[key]]
+
+        return {i for i in range(vector.bit_length()) if vector >> i & 1}
+
+    def test_scores_are_jaccard(self):
+        keys = list(self.movies)[:20]
+        rows = [self.index.rows[key] for key in keys]
+        for key, line in zip(keys, self.index._scores(rows)):
+            for other in keys:
+                a, b = self.bits(key), self.bits(other)
+                self.assertAlmostEqual(
+                    line[self.index.rows[other]],
+                    len(a & b) / len(a | b)
+                )
+
+    def test_neighbors_exclude_self_and_round_trip(self):
+        key = next(iter(self.movies))
+        neighbors = self.index.neighbors(key, k=5)
+        self.assertEqual(len(neighbors), 5)
+        self.assertNotIn(key, [n for n, _ in neighbors])
+        scores = [score for _, score in neighbors]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        with tempfile.TemporaryDirectory() as tmpDir:
+            file = os.path.join(tmpDir, "neighbors.json")
+            save_neighbors({key : neighbors}, file)
+            self.assertEqual(load_neighbors(file), {key : neighbors})
+
+    @unittest.skipIf(similarity.np is None, "NumPy is not installed.")
+    def test_numpy_matches_pure_python(self):
+        fast = SimilarityIndex(self.movies, self.parser, useNumpy=True)
+        rows = list(range(len(self.movies)))
+        for expected, line in zip(
+            self.index._scores(rows),
+            fast._scores(rows).tolist()
+        ):
+            for a, b in zip(expected, line):
+                self.assertAlmostEqual(a, b)
+        self.assertEqual(fast.precompute(k=5), self.index.precompute(k=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
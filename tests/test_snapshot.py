@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import yaml
+
+from mvdb.catalog import build_snapshot_catalog, load_snapshot_catalog
+from mvdb.plugins.inventory import _UNBUILT, build_inventory
+from mvdb.snapshot import Snapshot, build_snapshot
+
+
+class SnapshotTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open("archives/movies.yml") as f:
+            cls.movies = yaml.safe_load(f)
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.snapshotFile = os.path.join(self.tmpDir.name, "movies.snap")
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def test_round_trip(self):
+        build_snapshot(self.movies, self.snapshotFile)
+        with Snapshot(self.snapshotFile) as snapshot:
+            self.assertEqual(list(snapshot), list(self.movies))
+            for key, movie in self.movies.items():
+                self.assertEqual(snapshot[key], movie)
+                self.assertEqual(
+                    snapshot.groups()[key],
+                    movie.get("groups") or []
+                )
+
+    def test_group_filter_decodes_no_records(self):
+        build_snapshot_catalog(self.snapshotFile)
+        catalog = load_snapshot_catalog(self.snapshotFile, rebuild=False)
+        inventory = build_inventory(
+            catalog["hosts"],
+            catalog["groups"],
+            catalog["defaults"]
+        )
+        expected = [
+            key for key, movie in self.movies.items()
+            if "4k_uhd" in (movie.get("groups") or [])
+            or "hdr10" in (movie.get("groups") or [])
+            or "hdr10_dv" in (movie.get("groups") or [])
+        ]
+        with mock.patch.object(Snapshot, "movie") as movie:
+            hosts = inventory.hosts.parent_group_hosts("4k_uhd")
+            movie.assert_not_called()
+        self.assertEqual(sorted(hosts), sorted(expected))
+        self.assertTrue(all(h is _UNBUILT for h in dict.values(hosts)))
+        catalog["hosts"].close()
+
+    def test_other_version_is_rebuilt(self):
+        with open(self.snapshotFile, "wb") as f:
+            f.write(b"MVDBSNAP" + b"\0" * 512)
+        catalog = load_snapshot_catalog(self.snapshotFile)
+        self.assertEqual(len(catalog["hosts"]), len(self.movies))
+        self.assertEqual(catalog["groups"]["hdr10"]["groups"], ["4k_uhd"])
+        catalog["hosts"].close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import yaml
+
+import mvdb.storage
+
+
+class StorageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.dbFile = os.path.join(self.tmpDir.name, "movies.db")
+        self.hostFile = os.path.join(self.tmpDir.name, "movies.yml")
+        with open("archives/movies.yml") as f:
+            self.movies = dict(list(yaml.safe_load(f).items())[:3])
+        self.write_hosts(self.movies)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def write_hosts(self, movies):
+        with open(self.hostFile, "w") as f:
+            yaml.safe_dump(movies, f)
+
+    def count(self, dbFile):
+        conn = mvdb.storage.connect(dbFile)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_import_prune_resyncs(self):
+        conn = mvdb.storage.connect(self.dbFile)
+        mvdb.storage.import_movies(conn, self.hostFile)
+        removed = next(iter(self.movies))
+        self.write_hosts({
+            k : v for k, v in self.movies.items() if k != removed
+        })
+        self.assertEqual(
+            mvdb.storage.import_movies(conn, self.hostFile, prune=True),
+            [removed]
+        )
+        conn.close()
+        self.assertEqual(self.count(self.dbFile), 2)
+
+    def test_release_candidate_leaves_catalog_untouched(self):
+        conn = mvdb.storage.connect(self.dbFile)
+        mvdb.storage.import_movies(conn, self.hostFile)
+        conn.close()
+        movie, mv = next(iter(self.movies.items()))
+        conn = mvdb.storage.connect_rc(self.dbFile)
+        mvdb.storage.add_movies(conn, {f"{movie}_2" : mv})
+        conn.close()
+        self.assertEqual(self.count(self.dbFile), 3)
+        self.assertEqual(self.count(self.dbFile + ".rc"), 4)
+
+    def test_chained_sort_overrides_apply_once(self):
+        first, second, third = self.movies
+        conn = mvdb.storage.connect(self.dbFile)
+        mvdb.storage.import_movies(conn, self.hostFile)
+        keys = {
+            key : self.movies[key]["sort_key"]
+            for key in (first, second, third)
+        }
+        overrides = {
+            keys[first] : keys[second],
+            keys[second] : keys[third],
+        }
+        self.assertEqual(mvdb.storage.update_sort_keys(conn, overrides), 2)
+        sortKeys = dict(conn.execute("SELECT key, sort_key FROM movies"))
+        conn.close()
+        self.assertEqual(sortKeys, {
+            first : keys[second],
+            second : keys[third],
+            third : keys[third],
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
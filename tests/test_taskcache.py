@@ -0,0 +1,143 @@
+import os
+import tempfile
+import time
+import unittest
+
+from nornir.core import Nornir
+from nornir.core.task import Result
+from nornir.plugins.runners import SerialRunner
+import yaml
+
+from mvdb.plugins.inventory import build_inventory
+from mvdb.tasks import package_marquee
+from mvdb.taskcache import CachingRunner, TaskCache
+
+
+def build_nornir(runner=None):
+    hosts = {
+        "heat" : {
+            "groups" : ["blu-ray"],
+            "data" : {"title" : "Heat", "release" : {"discs" : 2}},
+        },
+        "ran" : {
+            "groups" : ["blu-ray"],
+            "data" : {"title" : "Ran", "release" : {"discs" : 1}},
+        },
+    }
+    groups = {"blu-ray" : {"data" : {"format" : "Blu-ray"}}}
+    defaults = {"data" : {"mpaa" : {"rating" : None}}}
+
+    return Nornir(
+        inventory=build_inventory(hosts, groups, defaults),
+        runner=runner or SerialRunner(),
+    )
+
+
+def build_marquee_nornir(runner):
+    with open("archives/movies.yml") as f:
+        hosts = dict(list(yaml.safe_load(f).items())[:5])
+    with open("archives/groups.yml") as f:
+        groups = yaml.safe_load(f)
+    with open("archives/defaults.yml") as f:
+        defaults = yaml.safe_load(f)
+
+    return Nornir(
+        inventory=build_inventory(hosts, groups, defaults),
+        runner=runner,
+    )
+
+
+def add_disc(task):
+    task.host.data["release"]["discs"] += 1
+
+    return Result(host=task.host, result=task.host.data["release"]["discs"])
+
+
+def slow_title(task):
+    time.sleep(0.01)
+
+    return Result(host=task.host, result=task.host.data["title"].upper())
+
+
+class CachingRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.cache = TaskCache(os.path.join(self.tmpDir.name, "cache.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpDir.cleanup()
+
+    def cached_nornir(self):
+        return build_nornir(CachingRunner(SerialRunner(), self.cache))
+
+    def test_nested_mutation_matches_uncached(self):
+        plain = build_nornir()
+        cached = self.cached_nornir()
+        for _ in range(2):
+            plain.run(task=add_disc)
+            cached.run(task=add_disc)
+        for name, host in plain.inventory.hosts.items():
+            self.assertEqual(
+                cached.inventory.hosts[name].data["release"],
+                host.data["release"]
+            )
+        self.assertEqual(
+            cached.inventory.hosts["heat"].data["release"]["discs"],
+            4
+        )
+
+    def test_nested_mutation_replayed_on_fresh_inventory(self):
+        self.cached_nornir().run(task=add_disc)
+        nr = self.cached_nornir()
+        result = nr.run(task=add_disc)
+        self.assertEqual(nr.runner.last["misses"], 0)
+        self.assertEqual(result["heat"][0].result, 3)
+        self.assertEqual(nr.inventory.hosts["heat"].data["release"], {
+            "discs" : 3,
+        })
+
+    def test_unchanged_hosts_are_served_from_cache(self):
+        first = self.cached_nornir().run(task=slow_title)
+        nr = self.cached_nornir()
+        nr.inventory.hosts["ran"].data["title"] = "Kagemusha"
+        second = nr.run(task=slow_title)
+        self.assertEqual(nr.runner.last, {
+            "hits" : 1,
+            "misses" : 1,
+            "bypassed" : 0,
+        })
+        self.assertEqual(second["heat"][0].result, first["heat"][0].result)
+        self.assertEqual(second["ran"][0].result, "KAGEMUSHA")
+
+    def test_package_marquee_served_from_cache(self):
+        marquees = []
+        for _ in range(2):
+            nr = build_marquee_nornir(
+                CachingRunner(SerialRunner(), self.cache)
+            )
+            nr.run(task=package_marquee)
+            marquees.append({
+                name : host.data["marquee"]
+                for name, host in nr.inventory.hosts.items()
+            })
+        self.assertEqual(nr.runner.last, {
+            "hits" : len(marquees[0]),
+            "misses" : 0,
+            "bypassed" : 0,
+        })
+        self.assertEqual(marquees[1], marquees[0])
+
+    def test_bypassed_task_is_not_cached(self):
+        nr = build_nornir(
+            CachingRunner(SerialRunner(), self.cache, bypass=[slow_title])
+        )
+        for _ in range(2):
+            result = nr.run(task=slow_title)
+        self.assertEqual(nr.runner.last["bypassed"], 2)
+        self.assertEqual(result["heat"][0].result, "HEAT")
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,147 +1,524 @@
-"""Imports new movies via CSV and adds to archives/movies.yml
-
-Reads & parses "archives/movies.yml" into memory as dict movies. Next,
-importCSV is read & parsed into mem and resulting dict newMovies'
-keys are added to dict movies.
-
-User supplies the import file name and chooses how to handle duplicate
-entries. By default, duplicates are discarded and the existing entries
-remain in place.
-
-Script should be executed from the root dir of this repo as a module
-using the following syntax:
-
-    python -m utils.add_movies
-
-Upon successful execution of this script, the resulting release
-candidate inventory file will be written to "archives/movies.yml.rc"
-and can be compared with existing movies.yml file before being renamed
-for use with Nornir.
-"""
-
-import yaml
-
-from mvdb import HEADER
-import mvdb.data
-
-
-subdir = "archives/"
-barcodes = subdir + "barcodes.ini"
-barcodesRC = barcodes + ".rc"
-movieFile = subdir + "movies.yml"
-movieRC = movieFile + ".rc"
-importDir = "user_input/"
-importCSV = "movie_import_template.csv"
-
-
-def select_file(dir: str=importDir, default: str=importCSV,
-  header: str=HEADER):
-    """Prompts user to specify the import file name.
-
-    Args:
-      dir(str):
-        The specified directory where the file is located. Defaults to
-        importDir.
-      default(str):
-        The optional default value. Defaults to importCSV.
-      header(str):
-        Section break header, defaults to mvdb.data.header.
-
-      Returns:
-        The target file name to import.
-    """
-    while True:
-        print(
-            f"\n{header}\n"
-            '\nEnter import file name in .CSV format (Default is '
-              f'"{importCSV}").'
-            )
-        selection = input("\nFile name: ") or default
-        if selection.lower().endswith(".csv"):
-            break
-        else:
-            print(f'\nERR: "{selection}" is not a valid file name!')
-    fileName = dir + selection
-
-    return fileName
-
-
-def overwrite_select(header: str=HEADER):
-    """Prompts user to choose how to handle potential duplicate imports.
-
-    Args:
-      header(str):
-        Header string, defaults to mvdb.data.header.
-
-    Returns:
-      Overwrite selection as a boolean value.
-    """
-    print(
-        f"\n{header}\n"
-        '\nChoose how to handle duplicate imports. "True" will overwrite '
-          'existing entries with the newer duplicates, "False" will skip the '
-          'new entries without modifying the existing ones. (True or False, '
-          'defaults to False).'
-    )
-    overwrite = False
-    while True:
-        selection = input("\nOverwrite? [True/False]: ").lower() or "f"
-        if(selection == "true" or selection == "t"):
-            overwrite = True
-            break
-        elif(selection == "false" or selection == "f"):
-            break
-        else:
-            print(
-                f'\nERR: "{selection}" is not a valid selection! Please enter '
-                  'True or False.'
-            )
-
-    return overwrite
-
-
-def summarize(rcFile: str, ogFile: str, header: str=HEADER):
-    """Summarizes task and prints summary to terminal.
-
-    Args:
-      rcFile(str):
-        The release candidate file.
-      ogFile(str):
-        The original file to be compared against before overwriting
-        with the release candidate.
-      header(str):
-        Section break header.
-
-    Returns:
-      None
-    """
-    print(
-        f"\n{header}\n"
-        f'\nExport written to file as "{rcFile}". Compare to "{ogFile}" '
-          "before renaming the release candidate."
-    )
-
-
-if __name__ == "__main__":
-    with open(movieFile) as f:
-        yaml_blob = f.read()
-    movies = yaml.safe_load(yaml_blob)
-    importFile = select_file()
-    newMovies = mvdb.data.import_movies_csv(importFile)
-    overwrite = overwrite_select()
-    mvdb.data.add_movies(movies, newMovies, overwrite=overwrite)
-    sortKeys = mvdb.data.fetch_sortKeys(movies)
-    list.sort(sortKeys)
-    movies = mvdb.data.sort_catalog(
-        movieDict=movies,
-        sortKey_list=sortKeys,
-        dataHeader="sort_key"
-    )
-    mvdb.data.write_barcodes(movies, barcodesRC)
-    movies_yml = mvdb.data.dump_movies_yaml(movies)
-
-    mvdb.data.export_movies_yaml(movies_yml, movieRC)
-
-    summarize(rcFile=barcodesRC, ogFile=barcodes)
-    summarize(rcFile=movieRC, ogFile=movieFile)
-    print(f"\n{HEADER}")
+"""Imports new movies via CSV and adds to archives/movies.yml
+
+Indexes "archives/movies.yml" by byte offset and parses only the
+existing entries which collide with the import. Next, importCSV is read
+& parsed into mem and resulting dict newMovies' keys are added to the
+catalog.
+
+User supplies the import file name and chooses how to handle duplicate
+entries. By default, duplicates are discarded and the existing entries
+remain in place.
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.add_movies
+
+Upon successful execution of this script, the resulting release
+candidate inventory file will be written to "archives/movies.yml.rc"
+and can be compared with existing movies.yml file before being renamed
+for use with Nornir.
+
+If the SQLite catalog "archives/movies.db" exists (see utils.build_db),
+new movies are upserted into a release candidate copy of it,
+"archives/movies.db.rc", and the other release candidates are exported
+from that copy instead of rewriting the YAML in memory. movies.db is
+left as-is until the candidates are accepted.
+
+Passing one or more import files, directories or glob patterns runs the
+script non-interactively in batch mode:
+
+    python -m utils.add_movies [--duplicates {skip,overwrite,error}]
+      [--jobs N] [--journal] FILE_OR_DIR_OR_GLOB [...]
+
+In batch mode every CSV is parsed concurrently and merged into the
+catalog in a single pass with one sort and one write. Progress is
+printed to stderr and a JSON summary to stdout. The script exits with
+status 1, without writing anything, if any file fails to import or if
+duplicates are found under the "error" policy.
+
+With --journal, batch mode appends the merged movies to the mutation
+journal ("archives/movies.journal", see mvdb.journal) instead of
+writing release candidates. MvDB replays the journal at load and
+utils.compact_journal folds it into movies.yml. Every write holds the
+journal lock, so concurrent runs of this script are serialized.
+
+With --profile [DIR], each pipeline stage is profiled and the results
+are written to DIR (defaults to "profile/"); see mvdb.profiling.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+
+from mvdb import HEADER
+import mvdb.data
+import mvdb.diff
+import mvdb.journal
+import mvdb.offsets
+import mvdb.profiling
+import mvdb.storage
+
+
+subdir = "archives/"
+barcodes = subdir + "barcodes.ini"
+barcodesRC = barcodes + ".rc"
+movieFile = subdir + "movies.yml"
+movieRC = movieFile + ".rc"
+dbFile = subdir + "movies.db"
+importDir = "user_input/"
+importCSV = "movie_import_template.csv"
+
+
+def select_file(dir: str=importDir, default: str=importCSV,
+  header: str=HEADER):
+    """Prompts user to specify the import file name.
+
+    Args:
+      dir(str):
+        The specified directory where the file is located. Defaults to
+        importDir.
+      default(str):
+        The optional default value. Defaults to importCSV.
+      header(str):
+        Section break header, defaults to mvdb.data.header.
+
+      Returns:
+        The target file name to import.
+    """
+    while True:
+        print(
+            f"\n{header}\n"
+            '\nEnter import file name in .CSV format (Default is '
+              f'"{importCSV}").'
+            )
+        selection = input("\nFile name: ") or default
+        if selection.lower().endswith(".csv"):
+            break
+        else:
+            print(f'\nERR: "{selection}" is not a valid file name!')
+    fileName = dir + selection
+
+    return fileName
+
+
+def overwrite_select(header: str=HEADER):
+    """Prompts user to choose how to handle potential duplicate imports.
+
+    Args:
+      header(str):
+        Header string, defaults to mvdb.data.header.
+
+    Returns:
+      Overwrite selection as a boolean value.
+    """
+    print(
+        f"\n{header}\n"
+        '\nChoose how to handle duplicate imports. "True" will overwrite '
+          'existing entries with the newer duplicates, "False" will skip the '
+          'new entries without modifying the existing ones. (True or False, '
+          'defaults to False).'
+    )
+    overwrite = False
+    while True:
+        selection = input("\nOverwrite? [True/False]: ").lower() or "f"
+        if(selection == "true" or selection == "t"):
+            overwrite = True
+            break
+        elif(selection == "false" or selection == "f"):
+            break
+        else:
+            print(
+                f'\nERR: "{selection}" is not a valid selection! Please enter '
+                  'True or False.'
+            )
+
+    return overwrite
+
+
+def summarize(rcFile: str, ogFile: str, header: str=HEADER):
+    """Summarizes task and prints summary to terminal.
+
+    If ogFile exists, a structural diff of the release candidate
+    against it is printed as well (see mvdb.diff).
+
+    Args:
+      rcFile(str):
+        The release candidate file.
+      ogFile(str):
+        The original file to be compared against before overwriting
+        with the release candidate.
+      header(str):
+        Section break header.
+
+    Returns:
+      None
+    """
+    print(
+        f"\n{header}\n"
+        f'\nExport written to file as "{rcFile}". Compare to "{ogFile}" '
+          "before renaming the release candidate."
+    )
+    if os.path.exists(ogFile):
+        with mvdb.profiling.stage("diff"):
+            report = mvdb.diff.diff_files(ogFile, rcFile)
+        print(mvdb.diff.format_report(report, ogFile, rcFile, header))
+
+
+def add_movies_db(newMovies: dict, overwrite: bool, dbFile: str=dbFile):
+    """Adds new movies to a copy of the SQLite catalog & exports the RCs.
+
+    The movies are written to the release candidate copy returned via
+    the storage.connect_rc func, so dbFile is not modified.
+
+    Args:
+      newMovies(dict):
+        New films imported using the mvdb.import_movies_csv func.
+      overwrite(bool):
+        Whether duplicates overwrite existing entries.
+      dbFile(str):
+        The SQLite catalog. Defaults to dbFile.
+
+    Returns:
+      None
+    """
+    conn = mvdb.storage.connect_rc(dbFile)
+    with mvdb.profiling.stage("transform"):
+        mvdb.storage.add_movies(conn, newMovies, overwrite=overwrite)
+    with mvdb.profiling.stage("barcode_write"):
+        mvdb.storage.export_barcodes_ini(conn, barcodesRC)
+    with mvdb.profiling.stage("yaml_dump"):
+        mvdb.storage.export_movies(conn, movieRC)
+    conn.close()
+
+
+def add_movies_yaml(
+    newMovies: dict,
+    overwrite: bool,
+    movieFile: str=movieFile
+):
+    """Adds new movies to the YAML catalog and writes the RC files.
+
+    Only the existing blocks whose keys collide with the import are
+    parsed (via the host file's offset index). All other blocks are
+    copied into the release candidate verbatim, and their UPCs are
+    taken from the offset index, so the barcodes RC is still derived
+    from movies.yml alone.
+
+    Args:
+      newMovies(dict):
+        New films imported using the mvdb.import_movies_csv func.
+      overwrite(bool):
+        Whether duplicates overwrite existing entries.
+      movieFile(str):
+        The Nornir host file. Defaults to movieFile.
+
+    Returns:
+      None
+    """
+    with mvdb.profiling.stage("yaml_read"):
+        index = mvdb.offsets.load_offset_index(movieFile)
+        movies = mvdb.offsets.load_movies(
+            [movie for movie in newMovies if movie in index],
+            movieFile,
+            index
+        )
+    with mvdb.profiling.stage("transform"):
+        mvdb.data.add_movies(movies, newMovies, overwrite=overwrite)
+
+    with mvdb.profiling.stage("barcode_write"):
+        upcs = {movie : entry[3] for movie, entry in index.items()}
+        for movie, mv in movies.items():
+            upcs[movie] = mv["data"]["release"]["upc"]
+        upcDict = {
+            movie : {"data" : {"release" : {"upc" : upcs[movie]}}}
+            for movie in mvdb.offsets.merged_order(index, movies)
+        }
+        mvdb.data.write_barcodes(upcDict, barcodesRC)
+    # Sorting happens within the splice, as new blocks are merged in.
+    with mvdb.profiling.stage("yaml_dump"):
+        movies_yml = mvdb.offsets.splice_movies(movies, movieFile, index)
+        mvdb.data.export_movies_yaml(movies_yml, movieRC)
+
+
+def expand_imports(patterns: list):
+    """Expands import arguments into a sorted list of CSV files.
+
+    Args:
+      patterns(list):
+        File names, directories (all .csv files inside are imported) or
+        glob patterns.
+
+    Returns:
+      List of CSV file names with duplicates removed.
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(glob.glob(os.path.join(pattern, "*.csv"))))
+        elif glob.has_magic(pattern):
+            files.extend(sorted(glob.glob(pattern)))
+        else:
+            files.append(pattern)
+
+    return list(dict.fromkeys(files))
+
+
+def parse_import(importFile: str):
+    """Imports a single CSV file with its progress output captured.
+
+    Runs in a worker process during batch imports.
+
+    Args:
+      importFile(str):
+        The CSV file to import.
+
+    Returns:
+      A tuple of the imported movies dict (None on failure) and an
+      error message (None on success).
+    """
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return mvdb.data.import_movies_csv(importFile), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def existing_keys(
+    keys: list,
+    hostFile: str=movieFile,
+    db: str=dbFile,
+    journalFile: str=mvdb.journal.JOURNAL
+):
+    """Returns the subset of keys already in the catalog.
+
+    The catalog is the SQLite database if it exists, otherwise the host
+    file, plus the movies added or deleted via the mutation journal
+    since it was last compacted. Callers should hold the journal lock.
+
+    Args:
+      keys(list):
+        Movie keys to look up.
+      hostFile(str):
+        Nornir host file. Defaults to movieFile.
+      db(str):
+        SQLite catalog used instead of hostFile if it exists. Defaults
+        to dbFile.
+      journalFile(str):
+        The mutation journal. Defaults to "archives/movies.journal".
+
+    Returns:
+      Set of keys present in the catalog.
+    """
+    if os.path.exists(db):
+        conn = mvdb.storage.connect(db)
+        try:
+            existing = mvdb.storage.fetch_existing_keys(conn, keys)
+        finally:
+            conn.close()
+    else:
+        index = mvdb.offsets.load_offset_index(hostFile)
+        existing = {key for key in keys if key in index}
+    wanted = set(keys)
+    for record in mvdb.journal.read_journal(journalFile):
+        if record["op"] == "delete":
+            existing.discard(record["key"])
+        elif record["key"] in wanted:
+            existing.add(record["key"])
+
+    return existing
+
+
+def batch_import(
+    files: list,
+    duplicates: str="skip",
+    jobs: int=None,
+    journal: bool=False
+):
+    """Imports many CSV files into the catalog in a single pass.
+
+    Files are parsed concurrently in a process pool and merged in the
+    order given. A key which appears more than once, either in the
+    catalog (including titles only in the mutation journal) or across
+    the import files, is handled per the duplicates policy: "skip"
+    keeps the first entry, "overwrite" keeps the last and "error"
+    aborts the batch. The release candidates are then sorted and
+    written once.
+
+    Args:
+      files(list):
+        CSV files returned via the expand_imports func.
+      duplicates(str):
+        Duplicate policy, one of "skip", "overwrite" or "error".
+        Defaults to "skip".
+      jobs(int):
+        Number of worker processes. Defaults to None, which uses the
+        number of CPUs.
+      journal(bool):
+        Whether the movies are appended to the mutation journal instead
+        of written to the release candidates. Defaults to False.
+
+    Returns:
+      A tuple of the JSON-serializable summary dict and the exit status.
+    """
+    summary = {
+        "files" : {},
+        "added" : [],
+        "overwritten" : [],
+        "skipped" : [],
+        "duplicates" : [],
+        "errors" : {},
+        "written" : False,
+    }
+    if not files:
+        summary["errors"]["*"] = "No import files found."
+        return summary, 1
+
+    with mvdb.profiling.stage("csv_read"):
+        if len(files) == 1:
+            results = [parse_import(files[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(parse_import, files))
+
+    with contextlib.ExitStack() as stack:
+        # The catalog is read & written under the journal lock, so that
+        # titles journaled by a concurrent run count as duplicates.
+        j = None
+        if journal:
+            j = stack.enter_context(mvdb.journal.Journal())
+        else:
+            stack.enter_context(mvdb.journal.lock())
+        existing = existing_keys(
+            [k for movies, _ in results if movies for k in movies]
+        )
+
+        return merge_imports(files, results, existing, duplicates, summary, j)
+
+
+def merge_imports(
+    files: list,
+    results: list,
+    existing: set,
+    duplicates: str,
+    summary: dict,
+    j: mvdb.journal.Journal=None
+):
+    """Merges parsed imports and writes them to the catalog.
+
+    Args:
+      files(list):
+        CSV files passed to the batch_import func.
+      results(list):
+        Tuples returned via the parse_import func, one per file.
+      existing(set):
+        Imported keys already in the catalog, returned via the
+        existing_keys func.
+      duplicates(str):
+        Duplicate policy, one of "skip", "overwrite" or "error".
+      summary(dict):
+        The batch_import func's summary dict, updated in place.
+      j(Journal):
+        Open journal the movies are appended to instead of the release
+        candidates. Defaults to None.
+
+    Returns:
+      A tuple of the summary dict and the exit status.
+    """
+    merged = {}
+    duplicated = set()
+    for importFile, (movies, error) in zip(files, results):
+        if error is not None:
+            summary["errors"][importFile] = error
+            continue
+        summary["files"][importFile] = len(movies)
+        for movie, mv in movies.items():
+            if movie in merged or movie in existing:
+                if movie not in duplicated:
+                    duplicated.add(movie)
+                    summary["duplicates"].append(movie)
+                if duplicates != "overwrite":
+                    continue
+            merged[movie] = mv
+
+    if summary["errors"] or (duplicates == "error" and summary["duplicates"]):
+        return summary, 1
+
+    for movie in merged:
+        if movie in existing:
+            summary["overwritten"].append(movie)
+        else:
+            summary["added"].append(movie)
+    if duplicates == "skip":
+        summary["skipped"] = list(summary["duplicates"])
+
+    if j is not None:
+        for movie in summary["added"]:
+            j.add(movie, merged[movie])
+        for movie in summary["overwritten"]:
+            j.update(movie, merged[movie])
+        summary["written"] = True
+        return summary, 0
+
+    overwrite = duplicates == "overwrite"
+    with contextlib.redirect_stdout(sys.stderr):
+        if os.path.exists(dbFile):
+            add_movies_db(merged, overwrite)
+        else:
+            add_movies_yaml(merged, overwrite)
+        summarize(rcFile=barcodesRC, ogFile=barcodes)
+        summarize(rcFile=movieRC, ogFile=movieFile)
+    summary["written"] = True
+
+    return summary, 0
+
+
+if __name__ == "__main__":
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument("imports", nargs="*", metavar="FILE_OR_DIR_OR_GLOB")
+    argp.add_argument(
+        "--duplicates",
+        choices=("skip", "overwrite", "error"),
+        default="skip"
+    )
+    argp.add_argument("--jobs", type=int)
+    argp.add_argument("--journal", action="store_true")
+    argp.add_argument(
+        "--profile",
+        nargs="?",
+        const=mvdb.profiling.PROFILE_DIR,
+        metavar="DIR"
+    )
+    args = argp.parse_args()
+
+    with mvdb.profiling.profile(args.profile):
+        if args.imports:
+            summary, status = batch_import(
+                expand_imports(args.imports),
+                duplicates=args.duplicates,
+                jobs=args.jobs,
+                journal=args.journal
+            )
+        else:
+            importFile = select_file()
+            with mvdb.profiling.stage("csv_read"):
+                newMovies = mvdb.data.import_movies_csv(importFile)
+            overwrite = overwrite_select()
+            with mvdb.journal.lock():
+                if os.path.exists(dbFile):
+                    add_movies_db(newMovies, overwrite)
+                else:
+                    add_movies_yaml(newMovies, overwrite)
+
+            summarize(rcFile=barcodesRC, ogFile=barcodes)
+            summarize(rcFile=movieRC, ogFile=movieFile)
+            print(f"\n{HEADER}")
+
+    if args.imports:
+        print(json.dumps(summary, indent=2))
+        sys.exit(status)
@@ -0,0 +1,34 @@
+"""Builds the SQLite catalog from the current Nornir inventory files.
+
+Reads "archives/movies.yml" and "archives/barcodes.ini" into the
+normalized SQLite catalog at "archives/movies.db". Existing entries are
+replaced and entries no longer in movies.yml are deleted, so the script
+can be rerun to resync the database with the YAML/INI files.
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.build_db
+
+Once "archives/movies.db" exists, utils.add_movies,
+utils.update_sort_keys and utils.update_groups apply their edits to a
+release candidate copy of it, "archives/movies.db.rc", which is renamed
+over movies.db when the other release candidates are accepted.
+"""
+
+import mvdb.storage
+
+
+subdir = "archives/"
+barcodes = subdir + "barcodes.ini"
+movieFile = subdir + "movies.yml"
+dbFile = subdir + "movies.db"
+
+
+if __name__ == "__main__":
+    conn = mvdb.storage.connect(dbFile)
+    stale = mvdb.storage.import_movies(conn, movieFile, prune=True)
+    mvdb.storage.import_barcodes_ini(conn, barcodes)
+    conn.close()
+    if stale:
+        print(f"{len(stale)} movies no longer in {movieFile} deleted.")
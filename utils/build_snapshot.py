@@ -0,0 +1,23 @@
+"""Builds a memory-mapped catalog snapshot from archives/movies.yml.
+
+The snapshot at "archives/movies.snap" is immutable and can be opened
+by any number of worker processes, which share a single copy of it via
+the OS page cache. Point the MvDBInventory plugin's catalog_file option
+at the snapshot to load the inventory from it.
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.build_snapshot
+"""
+
+from mvdb.catalog import build_snapshot_catalog
+
+
+subdir = "archives/"
+movieFile = subdir + "movies.yml"
+snapshotFile = subdir + "movies.snap"
+
+
+if __name__ == "__main__":
+    build_snapshot_catalog(snapshotFile, movieFile)
@@ -0,0 +1,48 @@
+"""Writes a listing of the movie collection.
+
+Loads the inventory via MvDB, optionally narrows it to a single parent
+group (e.g. "4k_uhd" or "steelbook") and streams the collection report
+to stdout or a file in text, CSV, Markdown or HTML format.
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.collection_report [--format {text,csv,md,html}]
+      [--group GROUP] [--group-by {format,publisher,decade}]
+      [--page N] [--page-size N] [--output FILE]
+"""
+
+import argparse
+import sys
+
+from mvdb import MvDB
+import mvdb.report
+
+
+if __name__ == "__main__":
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument("--format", choices=mvdb.report.WRITERS, default="text")
+    argp.add_argument("--group", help="Only report titles in this group.")
+    argp.add_argument("--group-by", choices=mvdb.report.GROUPINGS)
+    argp.add_argument("--page", type=int)
+    argp.add_argument("--page-size", type=int, default=50)
+    argp.add_argument("--output", help="Defaults to stdout.")
+    args = argp.parse_args()
+
+    db = MvDB()
+    nr = db.nr if args.group is None else db.filter_group(args.group)
+    stream = sys.stdout
+    if args.output is not None:
+        stream = open(args.output, "w", newline="")
+    try:
+        mvdb.report.write_report(
+            nr.inventory.hosts,
+            stream,
+            fmt=args.format,
+            groupBy=args.group_by,
+            page=args.page,
+            pageSize=args.page_size
+        )
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
@@ -0,0 +1,30 @@
+"""Folds the mutation journal into archives/movies.yml.
+
+Replays "archives/movies.journal" on top of "archives/movies.yml",
+re-sorts the catalog and atomically replaces movies.yml and
+barcodes.ini before truncating the journal. If the SQLite catalog
+"archives/movies.db" exists, the journal is applied to it as well and
+both files are exported from it. The journal lock is held throughout,
+so writers appending to the journal wait for compaction to finish.
+
+Unlike the other utils, no release candidate is written: journaled
+edits are already live, since MvDB replays the journal at load and
+duplicate checks read it, so compaction only changes where they are
+stored.
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.compact_journal
+"""
+
+from mvdb import HEADER
+import mvdb.journal
+
+
+if __name__ == "__main__":
+    folded = mvdb.journal.compact()
+    print(
+        f"\n{HEADER}\n"
+        f'\n{folded} journal records folded into "archives/movies.yml".'
+    )
@@ -0,0 +1,49 @@
+"""Structurally compares release candidates against the current catalog.
+
+Compares "archives/movies.yml.rc" to "archives/movies.yml" and
+"archives/barcodes.ini.rc" to "archives/barcodes.ini", reporting added,
+removed, reordered and changed movies along with per-field deltas.
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.diff_catalog [--json] [OG_FILE RC_FILE]
+
+Passing --json prints a machine-readable report instead of the human
+one. An explicit pair of files may be given; files ending in ".ini" are
+compared as barcode files.
+"""
+
+import argparse
+import json
+
+from mvdb import HEADER
+import mvdb.diff
+
+
+subdir = "archives/"
+barcodes = subdir + "barcodes.ini"
+barcodesRC = barcodes + ".rc"
+movieFile = subdir + "movies.yml"
+movieRC = movieFile + ".rc"
+
+
+if __name__ == "__main__":
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument("files", nargs="*", metavar="FILE")
+    argp.add_argument("--json", action="store_true")
+    args = argp.parse_args()
+    if len(args.files) == 2:
+        pairs = [tuple(args.files)]
+    elif not args.files:
+        pairs = [(movieFile, movieRC), (barcodes, barcodesRC)]
+    else:
+        argp.error("expected OG_FILE and RC_FILE")
+
+    reports = {rc : mvdb.diff.diff_files(og, rc) for og, rc in pairs}
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for og, rc in pairs:
+            print(mvdb.diff.format_report(reports[rc], og, rc))
+        print(f"\n{HEADER}")
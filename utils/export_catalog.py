@@ -0,0 +1,52 @@
+"""Exports the resolved movie catalog as JSON Lines or CSV.
+
+Loads the inventory via MvDB, optionally narrows it to a single parent
+group and streams one record per movie to stdout or a file. Each
+record includes the data inherited from the movie's groups and the
+inventory defaults.
+
+The CSV format mirrors "archives/movies.csv" and can be re-imported
+via mvdb.data.import_movies_csv (e.g. to regenerate the master
+spreadsheet from the curated movies.yml).
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.export_catalog [--format {jsonl,csv}]
+      [--group GROUP] [--output FILE]
+"""
+
+import argparse
+import sys
+
+from mvdb import MvDB
+import mvdb.data
+import mvdb.export
+
+
+if __name__ == "__main__":
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    argp.add_argument("--group", help="Only export titles in this group.")
+    argp.add_argument("--output", help="Defaults to stdout.")
+    args = argp.parse_args()
+
+    db = MvDB()
+    nr = db.nr if args.group is None else db.filter_group(args.group)
+    stream = sys.stdout
+    if args.output is not None:
+        stream = open(args.output, "w", newline="")
+    try:
+        if args.format == "csv":
+            mvdb.export.write_csv(
+                nr.inventory.hosts,
+                stream,
+                genres=mvdb.data.import_current_genres(db.parser, "summary"),
+                groups=db.inventory.groups,
+                defaults=db.inventory.defaults
+            )
+        else:
+            mvdb.export.write_jsonl(nr.inventory.hosts, stream)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
@@ -6,14 +6,20 @@ into YAML.
 Script should be executed from the root dir of this repo as a module
 using the following syntax:
 
-    python -m utils.import_movies
+    python -m utils.import_movies [--profile [DIR]]
 
 Upon successful execution of this script, the resulting inventory file
 will be written to "archives/movies.yml" and can subsequently be used
 with Nornir.
+
+With --profile, each pipeline stage is profiled and the results are
+written to DIR (defaults to "profile/"); see mvdb.profiling.
 """
 
+import argparse
+
 import mvdb.data
+import mvdb.profiling
 
 
 subdir = "archives/"
@@ -22,11 +28,25 @@ output = subdir + "movies.yml"
 
 
 if __name__ == "__main__":
-    movies = mvdb.data.import_movies_csv(file)
-    sortKeys = mvdb.data.fetch_sortKeys(movies)
-    list.sort(sortKeys)
-    movies = mvdb.data.sort_catalog(movies, sortKeys, "sort_key")
-    mvdb.data.write_barcodes(movies)
-    moviesYML = mvdb.data.dump_movies_yaml(movies)
-
-    mvdb.data.export_movies_yaml(moviesYML, output)
\ No newline at end of file
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument(
+        "--profile",
+        nargs="?",
+        const=mvdb.profiling.PROFILE_DIR,
+        metavar="DIR"
+    )
+    args = argp.parse_args()
+
+    with mvdb.profiling.profile(args.profile):
+        # Rows are read and transformed in a single streaming pass.
+        with mvdb.profiling.stage("csv_read"):
+            movies = mvdb.data.import_movies_csv(file)
+        with mvdb.profiling.stage("sort"):
+            sortKeys = mvdb.data.fetch_sortKeys(movies)
+            list.sort(sortKeys)
+            movies = mvdb.data.sort_catalog(movies, sortKeys, "sort_key")
+        with mvdb.profiling.stage("barcode_write"):
+            mvdb.data.write_barcodes(movies)
+        with mvdb.profiling.stage("yaml_dump"):
+            moviesYML = mvdb.data.dump_movies_yaml(movies)
+            mvdb.data.export_movies_yaml(moviesYML, output)
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Splits archives/movies.yml into sharded host files with a manifest.
+
+Reads "archives/movies.yml" and writes the shards and "manifest.json"
+to "archives/movies.d/". Rerunning the script only rewrites shards whose
+contents changed. Point the MvDBInventory plugin's shard_dir option at
+the directory to load the inventory from the shards in parallel. The
+manifest records the source file's stamp, so the plugin rebuilds stale
+shards at load.
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.shard_movies [--by {prefix,size}] [--size N]
+      [--prefix-length N] [--source FILE] [--output DIR]
+"""
+
+import argparse
+
+import mvdb.catalog
+
+
+subdir = "archives/"
+movieFile = subdir + "movies.yml"
+shardDir = subdir + "movies.d"
+
+
+if __name__ == "__main__":
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument("--by", choices=("prefix", "size"), default="prefix")
+    argp.add_argument("--size", type=int, default=500)
+    argp.add_argument("--prefix-length", type=int, default=1)
+    argp.add_argument("--source", default=movieFile)
+    argp.add_argument("--output", default=shardDir)
+    args = argp.parse_args()
+
+    written, total = mvdb.catalog.build_sharded_catalog(
+        args.output,
+        args.source,
+        by=args.by,
+        shardSize=args.size,
+        prefixLength=args.prefix_length
+    )
+    print(
+        f"{len(written)} of {total} shards written to "
+        f'"{args.output}".'
+    )
@@ -0,0 +1,51 @@
+"""Lists the movies most similar to a given title.
+
+Builds a SimilarityIndex over "archives/movies.yml" using the vocabulary
+in "archives/tech_specs.ini" and prints the nearest neighbors of each
+movie key given. With --precompute, the neighbors of every movie are
+computed and written to a JSON file instead.
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.similar_movies [-k N] MOVIE_KEY [...]
+    python -m utils.similar_movies [-k N] --precompute FILE
+"""
+
+import argparse
+from configparser import ConfigParser
+import yaml
+
+from mvdb import HEADER
+import mvdb.similarity
+
+
+subdir = "archives/"
+movieFile = subdir + "movies.yml"
+iniFile = subdir + "tech_specs.ini"
+
+
+if __name__ == "__main__":
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument("keys", nargs="*", metavar="MOVIE_KEY")
+    argp.add_argument("-k", type=int, default=10)
+    argp.add_argument("--precompute", metavar="FILE")
+    args = argp.parse_args()
+    if not args.keys and args.precompute is None:
+        argp.error("expected MOVIE_KEY or --precompute FILE")
+
+    with open(movieFile) as f:
+        movies = yaml.safe_load(f)
+    parser = ConfigParser()
+    parser.read(iniFile)
+    index = mvdb.similarity.SimilarityIndex(movies, parser)
+
+    if args.precompute is not None:
+        neighbors = index.precompute(args.k)
+        mvdb.similarity.save_neighbors(neighbors, args.precompute)
+        print(f'Neighbors for {len(neighbors)} movies written to '
+          f'"{args.precompute}".')
+    for key in args.keys:
+        print(f"\n{HEADER}\n\nMore like \"{movies[key]['data']['title']}\":\n")
+        for other, score in index.neighbors(key, args.k):
+            print(f"  {score:.3f}  {movies[other]['data']['title']}")
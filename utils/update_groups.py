@@ -0,0 +1,116 @@
+"""Re-derives rule-based groups after tech_specs.ini changes.
+
+Script reads archives/movies.yml (via the prebuilt binary catalog, see
+mvdb.catalog) and archives/tech_specs.ini into memory. Group rules (see
+mvdb.rules), e.g. "boutique" for every publisher listed under
+[boutiqueLabels], are evaluated through a publisher -> movies index so
+that only the titles whose membership changes are touched.
+
+The changed titles are listed and a release candidate YAML file is
+written to the archives. Only the changed movies are dumped; every
+other block is copied from movies.yml as-is.
+
+Script should be executed from the root dir of this repo as a module
+using the following syntax:
+
+    python -m utils.update_groups
+
+If the SQLite catalog "archives/movies.db" exists, the groups are
+updated in a release candidate copy of it, "archives/movies.db.rc", and
+the release candidate is exported from that copy. movies.db is left
+as-is until the candidates are accepted.
+"""
+
+from configparser import ConfigParser
+import os
+
+from mvdb import HEADER
+import mvdb.catalog
+import mvdb.diff
+import mvdb.offsets
+import mvdb.rules
+import mvdb.storage
+
+
+subdir = "archives/"
+movieFile = subdir + "movies.yml"
+rcFile = movieFile + ".rc"
+catalogFile = subdir + "movies.catalog"
+dbFile = subdir + "movies.db"
+iniFile = subdir + "tech_specs.ini"
+
+
+def update_groups_db(parser: ConfigParser, dbFile: str=dbFile):
+    """Re-derives groups in a copy of the SQLite catalog & exports the RC.
+
+    The groups are written to the release candidate copy returned via
+    the storage.connect_rc func, so dbFile is not modified.
+
+    Args:
+      parser(ConfigParser):
+        ConfigParser object which has already read tech_specs.ini.
+      dbFile(str):
+        The SQLite catalog. Defaults to dbFile.
+
+    Returns:
+      Changes returned via mvdb.rules.derive_groups.
+    """
+    conn = mvdb.storage.connect_rc(dbFile)
+    movies = mvdb.storage.fetch_publishers_groups(conn)
+    changes = mvdb.rules.derive_groups(movies, parser)
+    mvdb.storage.update_groups(conn, {
+        movie : mvdb.rules.apply_group_changes(movies[movie]["groups"], change)
+        for movie, change in changes.items()
+    })
+    mvdb.storage.export_movies(conn, rcFile)
+    conn.close()
+
+    return changes
+
+
+def update_groups_yaml(parser: ConfigParser, movieFile: str=movieFile):
+    """Re-derives groups in the YAML catalog & writes the RC.
+
+    Args:
+      parser(ConfigParser):
+        ConfigParser object which has already read tech_specs.ini.
+      movieFile(str):
+        The Nornir host file. Defaults to movieFile.
+
+    Returns:
+      Changes returned via mvdb.rules.derive_groups.
+    """
+    movies = mvdb.catalog.load_catalog(catalogFile, movieFile)["hosts"]
+    changes = mvdb.rules.derive_groups(movies, parser)
+    changed = {}
+    for movie, change in changes.items():
+        changed[movie] = dict(movies[movie])
+        changed[movie]["groups"] = mvdb.rules.apply_group_changes(
+            movies[movie].get("groups"),
+            change
+        )
+    index = mvdb.offsets.load_offset_index(movieFile)
+    moviesYML = mvdb.offsets.splice_movies(changed, movieFile, index)
+    with open(rcFile, "w") as f:
+        f.write(moviesYML)
+
+    return changes
+
+
+if __name__ == "__main__":
+    cp = ConfigParser()
+    cp.read(iniFile)
+    if os.path.exists(dbFile):
+        changes = update_groups_db(cp)
+    else:
+        changes = update_groups_yaml(cp)
+
+    print(f"\n{HEADER}\n\nGroup changes:")
+    for movie, change in changes.items():
+        for group in change["add"]:
+            print(f"  + {group}: {movie}")
+        for group in change["remove"]:
+            print(f"  - {group}: {movie}")
+    print(f"\n{len(changes)} titles re-tagged.")
+    report = mvdb.diff.diff_catalogs(movieFile, rcFile)
+    print(mvdb.diff.format_report(report, movieFile, rcFile))
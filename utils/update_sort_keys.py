@@ -14,45 +14,121 @@ using the following syntax:
 
 Note: If a match is made, the overide value is substituted for the
 current value, even if they are the same. The diff should reflect only
-the changes, if any, made to the inventory's sortKeys.
+the changes, if any, made to the inventory's sortKeys. A structural
+diff of the release candidate is printed once it has been written.
+
+If the SQLite catalog "archives/movies.db" exists, the overrides are
+applied as indexed updates to a release candidate copy of it,
+"archives/movies.db.rc", and the release candidate is exported from
+that copy. movies.db is left as-is until the candidates are accepted.
+
+With --profile [DIR], each pipeline stage is profiled and the results
+are written to DIR (defaults to "profile/"); see mvdb.profiling:
+
+    python -m utils.update_sort_keys --profile
 """
 
+import argparse
 from configparser import ConfigParser
+import os
 import yaml
 
 # from mvdb import HEADER
 import mvdb.data
+import mvdb.diff
+import mvdb.profiling
+import mvdb.storage
 
 
 subdir = "archives/"
 movieFile = subdir + "movies.yml"
 rcFile = movieFile + ".rc"
+dbFile = subdir + "movies.db"
+
+
+def update_sort_keys_db(overrides: dict, dbFile: str=dbFile):
+    """Applies sortKey overrides to a copy of the SQLite catalog.
+
+    The overrides are written to the release candidate copy returned
+    via the storage.connect_rc func, which the RC is exported from, so
+    dbFile is not modified.
+
+    Args:
+      overrides(dict):
+        Override pairs returned via mvdb.data.import_sort_overrides.
+      dbFile(str):
+        The SQLite catalog. Defaults to dbFile.
+
+    Returns:
+      None
+    """
+    conn = mvdb.storage.connect_rc(dbFile)
+    with mvdb.profiling.stage("transform"):
+        mvdb.storage.update_sort_keys(conn, overrides)
+    with mvdb.profiling.stage("yaml_dump"):
+        mvdb.storage.export_movies(conn, rcFile)
+    conn.close()
+
+
+def update_sort_keys_yaml(overrides: dict, movieFile: str=movieFile):
+    """Applies sortKey overrides to the YAML catalog & writes the RC.
+
+    Args:
+      overrides(dict):
+        Override pairs returned via mvdb.data.import_sort_overrides.
+      movieFile(str):
+        The Nornir host file. Defaults to movieFile.
+
+    Returns:
+      None
+    """
+    with mvdb.profiling.stage("yaml_read"):
+        with open(movieFile) as f:
+            movieBlob = f.read()
+        movies = yaml.safe_load(movieBlob)
+
+    with mvdb.profiling.stage("transform"):
+        for movie in movies:
+            sortKey = movies[movie]["sort_key"]
+            if sortKey in overrides.keys():
+                movies[movie]["sort_key"] = overrides[sortKey]
+
+    with mvdb.profiling.stage("sort"):
+        sortKeys = mvdb.data.fetch_sortKeys(movies)
+        list.sort(sortKeys)
+
+        movies = mvdb.data.sort_catalog(
+            movieDict=movies,
+            sortKey_list=sortKeys,
+            dataHeader="sort_key"
+        )
+
+    with mvdb.profiling.stage("yaml_dump"):
+        moviesYML = mvdb.data.dump_movies_yaml(movies)
+        mvdb.data.export_movies_yaml(moviesYML, rcFile)
 
 
 if __name__ == "__main__":
-    with open(movieFile) as f:
-        movieBlob = f.read()
-    movies = yaml.safe_load(movieBlob)
-
-    cp = ConfigParser()
-    cp.read("archives/tech_specs.ini")
-    overrides = mvdb.data.import_sort_overrides(
-        parser=cp,
-        dataHeader="sortKeys"
-    )
-    for movie in movies:
-        sortKey = movies[movie]["sort_key"]
-        if sortKey in overrides.keys():
-            movies[movie]["sort_key"] = overrides[sortKey]
-
-    sortKeys = mvdb.data.fetch_sortKeys(movies)
-    list.sort(sortKeys)
-
-    movies = mvdb.data.sort_catalog(
-        movieDict=movies,
-        sortKey_list=sortKeys,
-        dataHeader="sort_key"
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument(
+        "--profile",
+        nargs="?",
+        const=mvdb.profiling.PROFILE_DIR,
+        metavar="DIR"
     )
+    args = argp.parse_args()
 
-    moviesYML = mvdb.data.dump_movies_yaml(movies)
-    mvdb.data.export_movies_yaml(moviesYML, rcFile)
\ No newline at end of file
+    with mvdb.profiling.profile(args.profile):
+        cp = ConfigParser()
+        cp.read("archives/tech_specs.ini")
+        overrides = mvdb.data.import_sort_overrides(
+            parser=cp,
+            dataHeader="sortKeys"
+        )
+        if os.path.exists(dbFile):
+            update_sort_keys_db(overrides)
+        else:
+            update_sort_keys_yaml(overrides)
+        with mvdb.profiling.stage("diff"):
+            report = mvdb.diff.diff_catalogs(movieFile, rcFile)
+    print(mvdb.diff.format_report(report, movieFile, rcFile))